@@ -6,9 +6,17 @@ root_dir = os.path.dirname(os.path.dirname(__file__))
 c_dir = os.path.join(root_dir, "c")
 csv_dir = os.path.join(root_dir, "csv")
 dst_dir = os.path.join(root_dir, "json")
+cache_dir = os.path.join(root_dir, ".cache")
 
 
 def pprint_top_entries(table, num_entries=10):
     keys = list(table)[:10]
     subdict = {key: table[key] for key in keys}
-    pprint.pprint(subdict)
\ No newline at end of file
+    pprint.pprint(subdict)
+
+
+def run_stage(stage_cache, func, inputs, *args):
+    """Run a parser stage through stage_cache, or directly if there is none."""
+    if stage_cache is None:
+        return func(*args)
+    return stage_cache.run(func, inputs, *args)
@@ -0,0 +1,199 @@
+from functools import cached_property
+from convert.collect_fields import add_field_types, collect_field_types
+from convert.encounters import EncounterIndex
+from convert.locations import create_location_lookup, update_pokemon_names
+from convert.moves import add_learned_moves, merge_compatibilities
+from convert.pipeline import parse_stages, run_stages
+from convert.profiling import StageProfiler
+from convert.pokedex import (
+    RelativesIndex,
+    add_compatible_moves,
+    add_dex_data,
+    iter_dex_data,
+    base_stats_fields,
+    merge_data,
+    merge_pokedex,
+    propagate_learnset,
+)
+
+moves_stages = ["tm_tutor", "tm_compatibility", "tutor_compatibility", "learnsets"]
+species_stages = ["base_stats", "egg_moves", "evolutions", "blurbs", "names"]
+dex_stages = ["pokedex_entries", "dex_categories", "species_to_dex", "pokedex_orders", "habitats"]
+
+
+class Pokedex:
+    """Lazy access to the parsed and merged Unbound data.
+
+    Creating a Pokedex parses nothing. Each property runs only the parser
+    stages it needs the first time it is read and caches the result, so
+    reading stats does not parse the locations or the move tables.
+    entries is the fully merged pokedex written out by main.py.
+    """
+
+    def __init__(self, jobs=1, stage_cache=None, profiler=None):
+        self.jobs = jobs
+        self.stage_cache = stage_cache
+        self.profiler = profiler if profiler is not None else StageProfiler(enabled=False)
+        self.parsed = {}
+
+    # Cached properties that later merges never modify, with the parser
+    # stages they are built from
+    reusable = {"moves": moves_stages}
+
+    def load(self, names=None):
+        """Run the named parser stages (all by default) that have not run yet."""
+        if names is None:
+            names = parse_stages
+        missing = {name: parse_stages[name] for name in names if name not in self.parsed}
+        if missing:
+            self.parsed.update(run_stages(missing, self.jobs, self.stage_cache, self.profiler))
+        return self.parsed
+
+    def reuse(self, previous, changed_stages):
+        """Copy the reusable properties of previous not built from changed_stages."""
+        reused = []
+        for name, stages in self.reusable.items():
+            if name in vars(previous) and not set(stages) & set(changed_stages):
+                vars(self)[name] = vars(previous)[name]
+                reused.append(name)
+        if "moves" in reused:
+            self.compatibility_index = previous.compatibility_index
+        return reused
+
+    def stage(self, name):
+        return self.load([name])[name]
+
+    @cached_property
+    def stats(self):
+        """Species to the fields parsed from the base stats table."""
+        return {species: {field: entry[field] for field in base_stats_fields if field in entry}
+                for species, entry in self.stage("base_stats").items()}
+
+    @cached_property
+    def learnsets(self):
+        """Species to level-up learnset, as parsed from the learnsets table."""
+        return self.stage("learnsets")
+
+    @cached_property
+    def egg_moves(self):
+        return self.stage("egg_moves")
+
+    @cached_property
+    def evolutions(self):
+        """EvolutionGraph of the merged pokedex, as built by the species merge."""
+        self.species
+        return self.evolution_graph
+
+    @cached_property
+    def moves(self):
+        """TM and tutor tables with their compatibility lists and level-up learners."""
+        parsed = self.load(moves_stages)
+        with self.profiler.stage("add_compatibilities") as record:
+            move_data = parsed["tm_tutor"]
+            self.compatibility_index = merge_compatibilities(
+                move_data, parsed["tm_compatibility"], parsed["tutor_compatibility"])
+            add_learned_moves(move_data, parsed["learnsets"])
+            record["records"] = len(self.compatibility_index)
+        return move_data
+
+    @cached_property
+    def species(self):
+        """Base stats merged with egg moves, evolutions, blurbs and names."""
+        parsed = self.load(species_stages)
+        with self.profiler.stage("build_pokedex") as record:
+            pokedex, self.evolution_graph = merge_pokedex(
+                parsed["base_stats"],
+                parsed["egg_moves"],
+                parsed["evolutions"],
+                parsed["blurbs"],
+                parsed["names"],
+            )
+            self.relatives_index = RelativesIndex(pokedex)
+            propagate_learnset(pokedex, relatives_index=self.relatives_index)
+            record["records"] = len(pokedex)
+        return pokedex
+
+    @cached_property
+    def locations(self):
+        """Route to method to area to species keys, with spreadsheet names resolved."""
+        location_data = self.stage("locations")
+        update_pokemon_names(location_data, self.species)
+        return location_data
+
+    @cached_property
+    def encounters(self):
+        """EncounterIndex of the resolved locations, filterable by species, route, method, area tag and level."""
+        return EncounterIndex.from_location_data(self.locations)
+
+    def merge_entries(self):
+        """Merge locations and moves into the species entries, before dex data is added."""
+        # Parse and build the inputs first, so no parser stage is timed
+        # inside a merge stage when the Pokedex was not loaded up front
+        move_data = self.moves
+        pokedex = self.species
+        location_data = self.locations
+        learnsets = self.learnsets
+        self.load(dex_stages)
+        with self.profiler.stage("merge_locations") as record:
+            location_lookup = create_location_lookup(location_data)
+            merge_data(pokedex, location_lookup, "location", self.relatives_index)
+            record["records"] = len(location_lookup)
+
+        with self.profiler.stage("merge_learnsets") as record:
+            merge_data(pokedex, learnsets, "learnset", self.relatives_index)
+            add_compatible_moves(pokedex, move_data, self.compatibility_index)
+            for learnset_key in ["learnset", "tm", "tutor"]:
+                propagate_learnset(pokedex, learnset_key, self.relatives_index)
+            record["records"] = len(learnsets)
+        return pokedex
+
+    def dex_data_args(self):
+        parsed = self.parsed
+        return (parsed["pokedex_entries"], parsed["species_to_dex"], parsed["pokedex_orders"],
+                parsed["habitats"], parsed["dex_categories"])
+
+    @cached_property
+    def entries(self):
+        """The fully merged pokedex: species data, locations, moves and dex data."""
+        pokedex = self.merge_entries()
+        with self.profiler.stage("add_dex_data") as record:
+            add_dex_data(pokedex, *self.dex_data_args())
+            record["records"] = len(self.parsed["species_to_dex"])
+        return pokedex
+
+    def iter_entries(self):
+        """Return an iterator of (species, entry) yielding each entry as it finishes merging.
+
+        Locations and learnsets are merged into the whole pokedex before
+        this returns, as forms take them from their relatives; each entry
+        is then yielded as soon as its dex data is added. entries and
+        fields are cached once every entry has been yielded.
+        """
+        if "entries" in vars(self):
+            return iter(self.entries.items())
+        return self.add_dex_data(self.merge_entries())
+
+    def add_dex_data(self, pokedex):
+        field_types = collect_field_types({})
+        for species, entry in iter_dex_data(pokedex, *self.dex_data_args()):
+            add_field_types(field_types, species, entry)
+            yield species, entry
+        vars(self)["entries"] = pokedex
+        vars(self).setdefault("fields", field_types)
+
+    @cached_property
+    def fields(self):
+        """Field name to value to the species that have it."""
+        return collect_field_types(self.entries)
+
+    def __getitem__(self, species):
+        return self.entries[species]
+
+    def __contains__(self, species):
+        return species in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
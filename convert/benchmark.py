@@ -0,0 +1,311 @@
+import argparse
+import copy
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from convert import c_dir, csv_dir, root_dir
+from convert.cache import StageCache
+from convert.locations import (
+    grass_encounters_file,
+    water_encounters_file,
+    check_area,
+    parse_location_files,
+    create_location_lookup,
+)
+from convert.moves import (
+    parse_tm_tutor_file,
+    parse_learnsets,
+    build_compatibility_table,
+    merge_compatibilities,
+)
+from convert.pokedex import (
+    parse_base_stats,
+    parse_egg_moves,
+    parse_evolutions,
+    convert_string_file,
+    merge_data,
+    merge_pokedex,
+    create_evolves_from,
+    add_compatible_moves,
+)
+
+default_scales = [1, 10]
+default_threshold = 0.2
+species_regex = re.compile(r'SPECIES_(\w+)')
+learnset_name_regex = re.compile(r's(\w+)LevelUpLearnset')
+string_entry_regex = re.compile(r'@(DEX_ENTRY|NAME)_(\w+)')
+egg_moves_regex = re.compile(r'egg_moves\((\w+),')
+
+
+def copy_suffix(copy_num):
+    return f"_S{copy_num}"
+
+
+def repeat_file(content, copies, rename):
+    """Concatenate copies of content, renaming species in every extra copy."""
+    return "".join([content] + [rename(content, copy_num) for copy_num in range(1, copies)])
+
+
+def rename_species(content, copy_num):
+    return species_regex.sub(lambda match: f"SPECIES_{match.group(1)}{copy_suffix(copy_num)}", content)
+
+
+def rename_learnsets(content, copy_num):
+    content = rename_species(content, copy_num)
+    return learnset_name_regex.sub(lambda match: f"s{match.group(1)}S{copy_num}LevelUpLearnset", content)
+
+
+def rename_strings(content, copy_num):
+    return string_entry_regex.sub(
+        lambda match: f"@{match.group(1)}_{match.group(2)}{copy_suffix(copy_num)}", content)
+
+
+def scale_egg_moves(content, copies):
+    # Only the body of gEggMoves is repeated; the parser stops at its end
+    start = content.index("{", content.index("gEggMoves")) + 1
+    end = content.index("EGG_MOVES_TERMINATOR", start)
+    body = content[start:end]
+    extra = [egg_moves_regex.sub(lambda match: f"egg_moves({match.group(1)}{copy_suffix(copy_num)},", body)
+             for copy_num in range(1, copies)]
+    return content[:end] + "".join(extra) + content[end:]
+
+
+def scale_compatibility(content, copies):
+    header, _, species = content.partition("\n")
+    names = [name for name in species.splitlines() if name.strip()]
+    lines = names + [name + copy_suffix(copy_num) for copy_num in range(1, copies) for name in names]
+    return header + "\n" + "\n".join(lines) + "\n"
+
+
+def is_species_cell(value):
+    value = value.strip()
+    return bool(value) and value != "X" and not check_area(value) and not (
+        "Rod" in value or value in ["Fishing", "Rock Smash"])
+
+
+def rename_csv_cell(value, copy_num, header):
+    """Rename a route header or species cell for one extra copy of the columns."""
+    if header:
+        return f"{value.strip()} S{copy_num}" if value.strip() else value
+    if is_species_cell(value):
+        return value.strip() + copy_suffix(copy_num)
+    return value
+
+
+def scale_csv(content, copies, header_lines):
+    """Repeat the route columns side by side, renaming routes and species in each copy.
+
+    Rows above the route header row are copied as they are.
+    """
+    lines = []
+    for line_num, line in enumerate(content.splitlines()):
+        cells = line.split(",,")
+        header = line_num == header_lines - 1
+        extra = [rename_csv_cell(cell, copy_num, header) if line_num >= header_lines - 1 else cell
+                 for copy_num in range(1, copies) for cell in cells]
+        lines.append(",,".join(cells + extra) + "\n")
+    return "".join(lines)
+
+
+def write_scaled(src, dst, copies, scale):
+    with open(src, 'r', encoding="utf-8") as file:
+        content = file.read()
+    with open(dst, 'w', encoding="utf-8") as file:
+        file.write(content if copies == 1 else scale(content, copies))
+
+
+def build_inputs(directory, copies):
+    """Write a copy of the c/ and csv/ inputs with copies times the species."""
+    src = os.path.join(directory, "c", "src")
+    strings = os.path.join(directory, "c", "strings")
+    locations = os.path.join(directory, "csv")
+    for path in [src, strings, locations]:
+        os.makedirs(path, exist_ok=True)
+
+    paths = {
+        "base_stats": os.path.join(src, "Base_Stats.c"),
+        "egg_moves": os.path.join(src, "Egg_Moves.c"),
+        "evolutions": os.path.join(src, "Evolution Table.c"),
+        "learnsets": os.path.join(src, "Learnsets.c"),
+        "tm_list": os.path.join(src, "TM_Tutor_Tables.c"),
+        "blurbs": os.path.join(strings, "Pokedex_Data.string"),
+        "names": os.path.join(strings, "Pokemon_Name_Table.string"),
+        "tm_compatibility": os.path.join(src, "tm_compatibility"),
+        "tutor_compatibility": os.path.join(src, "tutor_compatibility"),
+        "locations": locations,
+    }
+    sources = {name: os.path.join(c_dir, os.path.relpath(path, os.path.join(directory, "c")))
+               for name, path in paths.items() if name != "locations"}
+
+    def repeat(rename):
+        return lambda content, copies: repeat_file(content, copies, rename)
+
+    write_scaled(sources["base_stats"], paths["base_stats"], copies, repeat(rename_species))
+    write_scaled(sources["egg_moves"], paths["egg_moves"], copies, scale_egg_moves)
+    write_scaled(sources["evolutions"], paths["evolutions"], copies, repeat(rename_species))
+    write_scaled(sources["learnsets"], paths["learnsets"], copies, repeat(rename_learnsets))
+    shutil.copyfile(sources["tm_list"], paths["tm_list"])
+    write_scaled(sources["blurbs"], paths["blurbs"], copies, repeat(rename_strings))
+    write_scaled(sources["names"], paths["names"], copies, repeat(rename_strings))
+    for name in ["tm_compatibility", "tutor_compatibility"]:
+        os.makedirs(paths[name], exist_ok=True)
+        for entry in os.scandir(sources[name]):
+            if entry.name.endswith(".txt"):
+                write_scaled(entry.path, os.path.join(paths[name], entry.name), copies,
+                             scale_compatibility)
+    for file_name, header_lines in [(grass_encounters_file, 1), (water_encounters_file, 3)]:
+        write_scaled(os.path.join(csv_dir, file_name), os.path.join(locations, file_name), copies,
+                     lambda content, copies: scale_csv(content, copies, header_lines))
+    return paths
+
+
+def time_call(func, setup, repeat):
+    """Return the wall times of repeat calls to func(*setup())."""
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def parser_benchmarks(paths):
+    """Return (name, func, setup) for each parser and merge stage."""
+    base_stats = parse_base_stats(paths["base_stats"])
+    evolutions = parse_evolutions(paths["evolutions"])
+    learnsets = parse_learnsets(paths["learnsets"])
+    location_data = parse_location_files(paths["locations"])
+    location_lookup = create_location_lookup(location_data)
+    move_data = parse_tm_tutor_file(paths["tm_list"])
+    compatibility_index = merge_compatibilities(
+        move_data,
+        build_compatibility_table(paths["tm_compatibility"]),
+        build_compatibility_table(paths["tutor_compatibility"]),
+    )
+    pokedex, _ = merge_pokedex(
+        copy.deepcopy(base_stats),
+        parse_egg_moves(paths["egg_moves"]),
+        evolutions,
+        convert_string_file(paths["blurbs"]),
+        convert_string_file(paths["names"]),
+    )
+
+    # The tm table as a warm --incremental run finds it in the stage cache
+    stage_cache = StageCache(os.path.join(os.path.dirname(paths["locations"]), ".cache"))
+    stage_cache.run(build_compatibility_table, [paths["tm_compatibility"]], paths["tm_compatibility"])
+
+    def fresh_pokedex():
+        return copy.deepcopy(pokedex)
+
+    return [
+        ("parse_base_stats", parse_base_stats, lambda: (paths["base_stats"],)),
+        ("parse_egg_moves", parse_egg_moves, lambda: (paths["egg_moves"],)),
+        ("parse_evolutions", parse_evolutions, lambda: (paths["evolutions"],)),
+        ("convert_string_file", convert_string_file, lambda: (paths["blurbs"],)),
+        ("parse_learnsets", parse_learnsets, lambda: (paths["learnsets"],)),
+        ("build_compatibility_table", build_compatibility_table,
+         lambda: (paths["tm_compatibility"],)),
+        ("build_compatibility_table_cached", stage_cache.run,
+         lambda: (build_compatibility_table, [paths["tm_compatibility"]], paths["tm_compatibility"])),
+        ("parse_location_files", parse_location_files, lambda: (paths["locations"],)),
+        ("create_location_lookup", create_location_lookup, lambda: (location_data,)),
+        ("merge_data", merge_data, lambda: (fresh_pokedex(), learnsets, "learnset")),
+        ("create_evolves_from", create_evolves_from,
+         lambda: ({species: {"evolve_to": entry.get("evolve_to", [])}
+                   for species, entry in pokedex.items()},)),
+        ("add_compatible_moves", add_compatible_moves,
+         lambda: (fresh_pokedex(), move_data, compatibility_index)),
+    ]
+
+
+def run_main(repeat):
+    """Time full main.py runs on the checked-in data into a scratch directory."""
+    times = []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(root_dir, "main.py"),
+                            "--output-dir", directory],
+                           cwd=directory, check=True, stdout=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times):
+    return {"min": min(times), "median": statistics.median(times), "runs": len(times)}
+
+
+def run_benchmarks(scales=None, repeat=3, include_main=True):
+    if scales is None:
+        scales = default_scales
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = build_inputs(directory, scale)
+            for name, func, setup in parser_benchmarks(paths):
+                results[f"{name}@{scale}x"] = summarize(time_call(func, setup, repeat))
+                print(f"{name}@{scale}x: {results[f'{name}@{scale}x']['min']:.4f}s")
+    if include_main:
+        results["main@1x"] = summarize(run_main(repeat))
+        print(f"main@1x: {results['main@1x']['min']:.4f}s")
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=default_threshold):
+    """Return (name, baseline, current, ratio) for each benchmark slower than threshold."""
+    regressions = []
+    for name, result in current["results"].items():
+        try:
+            base_time = baseline["results"][name]["min"]
+        except KeyError:
+            continue
+        ratio = result["min"] / base_time if base_time else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append((name, base_time, result["min"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark each parser and merge stage on real and scaled inputs.")
+    parser.add_argument("--scales", type=int, nargs="+", default=default_scales, metavar="N",
+                        help="species count multipliers for the synthetic inputs, e.g. 1 10 100")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    parser.add_argument("--no-main", action="store_true", help="skip the full main.py run")
+    parser.add_argument("--output", metavar="FILE", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=default_threshold,
+                        help="allowed slowdown before a benchmark is flagged, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    current = run_benchmarks(args.scales, args.repeat, not args.no_main)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(current, file, indent=1)
+
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+        regressions = compare(baseline, current, args.threshold)
+        for name, base_time, current_time, ratio in regressions:
+            print(f"REGRESSION {name}: {base_time:.4f}s -> {current_time:.4f}s ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions beyond threshold")
+
+
+if __name__ == "__main__":
+    main()
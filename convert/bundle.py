@@ -0,0 +1,78 @@
+import json
+import mmap
+import struct
+from convert.model import to_json
+from convert.output import replace_file
+
+# Bundle layout: the magic bytes, a little-endian u32 header length, a
+# compact JSON header mapping each species to [offset, length], then the
+# compact JSON entries. Offsets are relative to the end of the header.
+magic = b"UBPK1\n"
+header_length = struct.Struct("<I")
+
+
+def pack_bundle(pokedex):
+    """Return the bundle bytes for the given pokedex."""
+    index = {}
+    entries = []
+    offset = 0
+    for species, entry in pokedex.items():
+        data = json.dumps(entry, separators=(",", ":"), default=to_json).encode("utf-8")
+        index[species] = [offset, len(data)]
+        entries.append(data)
+        offset += len(data)
+    header = json.dumps(index, separators=(",", ":")).encode("utf-8")
+    return b"".join([magic, header_length.pack(len(header)), header] + entries)
+
+
+def write_bundle(pokedex, path):
+    replace_file(path, pack_bundle(pokedex), 'wb')
+
+
+class PokedexBundle:
+    """Memory-mapped reader that decodes only the species requested."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self.file.close()
+            raise
+        if self.data[:len(magic)] != magic:
+            self.close()
+            raise ValueError(f"{path} is not a pokedex bundle")
+        start = len(magic) + header_length.size
+        (length,) = header_length.unpack_from(self.data, len(magic))
+        self.index = json.loads(self.data[start:start + length])
+        self.entries_start = start + length
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __contains__(self, species):
+        return species in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, species):
+        offset, length = self.index[species]
+        start = self.entries_start + offset
+        return json.loads(self.data[start:start + length])
+
+    def get(self, species, default=None):
+        try:
+            return self[species]
+        except KeyError:
+            return default
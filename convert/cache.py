@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import pickle
+from convert import cache_dir
+from convert.output import atomic_open
+
+manifest_file = "manifest.json"
+
+
+def scan_files(path):
+    """Yield (path, stat) for a file, or for every file below a directory in name order.
+
+    Directories are listed with os.scandir.
+    """
+    if not os.path.isdir(path):
+        yield path, os.stat(path)
+        return
+    with os.scandir(path) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        if entry.is_dir():
+            yield from scan_files(entry.path)
+        else:
+            yield entry.path, entry.stat()
+
+
+def fingerprint(paths, file_hashes=None):
+    """Hash the contents of the given files and directories.
+
+    file_hashes maps each file path to its [size, mtime_ns, hash] from an
+    earlier call. A file whose size and modification time still match is
+    not read again, and the entries of files that were hashed are updated.
+    """
+    if file_hashes is None:
+        file_hashes = {}
+    digest = hashlib.sha256()
+    for path in paths:
+        for file, stat in scan_files(path):
+            size, mtime, file_hash = file_hashes.get(file, (None, None, None))
+            if (size, mtime) != (stat.st_size, stat.st_mtime_ns):
+                with open(file, "rb") as f:
+                    file_hash = hashlib.sha256(f.read()).hexdigest()
+                file_hashes[file] = [stat.st_size, stat.st_mtime_ns, file_hash]
+            digest.update(os.path.relpath(file, path).encode("utf-8"))
+            digest.update(file_hash.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def code_fingerprint(package_dir=os.path.dirname(os.path.abspath(__file__))):
+    """Hash the source of every module in the convert package.
+
+    Parsers call helpers in other modules, such as the ctables tokenizer or
+    the model types, so any source change invalidates every stage.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith(".py"):
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(package_dir, name), "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Cache parser results keyed by the fingerprint of their input files.
+
+    The fingerprint also covers the source of the convert package so that
+    editing a parser or anything it calls invalidates its cached output. A
+    manifest records the fingerprint of each stage, and the size,
+    modification time and hash of each input file so that unchanged files
+    are only stat()ed on later runs.
+    """
+
+    def __init__(self, directory=cache_dir):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, manifest_file)
+        try:
+            with open(self.manifest_path, "r") as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault("stages", {})
+        self.manifest.setdefault("files", {})
+        self.hits = []
+        self.misses = []
+        self.code_fingerprint = code_fingerprint()
+
+    def stage_name(self, func, args):
+        name = f"{func.__module__}.{func.__name__}"
+        if args:
+            name += "-" + hashlib.sha1(repr(args).encode("utf-8")).hexdigest()[:8]
+        return name
+
+    def stage_fingerprint(self, func, inputs):
+        input_fingerprint = fingerprint(inputs, self.manifest["files"])
+        return hashlib.sha256((self.code_fingerprint + input_fingerprint).encode("utf-8")).hexdigest()
+
+    def load(self, func, inputs, *args):
+        """Return the cached result of func(*args), or raise KeyError."""
+        name = self.stage_name(func, args)
+        if self.manifest["stages"].get(name) != self.stage_fingerprint(func, inputs):
+            raise KeyError(name)
+        try:
+            with open(os.path.join(self.directory, name + ".pickle"), "rb") as file:
+                result = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Missing, truncated, or pickled from classes that no longer exist
+            raise KeyError(name)
+        self.hits.append(name)
+        return result
+
+    def store(self, func, inputs, result, *args):
+        """Cache result as the output of func(*args) for the current inputs."""
+        name = self.stage_name(func, args)
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_open(os.path.join(self.directory, name + ".pickle"), "wb") as file:
+            pickle.dump(result, file, pickle.HIGHEST_PROTOCOL)
+        self.manifest["stages"][name] = self.stage_fingerprint(func, inputs)
+        self.misses.append(name)
+
+    def run(self, func, inputs, *args):
+        """Return func(*args), reusing the cached result if inputs are unchanged."""
+        try:
+            return self.load(func, inputs, *args)
+        except KeyError:
+            pass
+        result = func(*args)
+        self.store(func, inputs, result, *args)
+        return result
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_open(self.manifest_path) as file:
+            json.dump(self.manifest, file, indent=1)
+
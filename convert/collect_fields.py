@@ -10,15 +10,20 @@ fields = {
 def collect_field_types(pokedex):
     data = {field: {} for field in fields}
     for species, entry in pokedex.items():
-        for field, source_fields in fields.items():
-            for source_field in source_fields:
-                try:
-                    source_value = entry[source_field]
-                except KeyError:
-                    continue
-                if "NONE" in source_value:
-                    continue
-                compatibility = data[field].get(source_value, [])
-                compatibility.append(species)
-                data[field][source_value] = compatibility
+        add_field_types(data, species, entry)
     return data
+
+
+def add_field_types(data, species, entry):
+    """Add the field values of one entry to the tables of collect_field_types."""
+    for field, source_fields in fields.items():
+        for source_field in source_fields:
+            try:
+                source_value = entry[source_field]
+            except KeyError:
+                continue
+            if "NONE" in source_value:
+                continue
+            compatibility = data[field].get(source_value, [])
+            compatibility.append(species)
+            data[field][source_value] = compatibility
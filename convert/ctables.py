@@ -0,0 +1,130 @@
+import re
+import sys
+
+# One pattern covers every part of a designated initializer: an index such
+# as [SPECIES_BULBASAUR] (with its value when it is a plain symbol, as in
+# [SPECIES_BULBASAUR - 1] = NATIONAL_DEX_BULBASAUR,) or a field such as
+# .baseHP = 45,
+initializer_regex = re.compile(
+    r'^[ \t]*(?:\[(\w+)[^\]\n]*\](?:[ \t]*=[ \t]*(\w+),)?|\.(\w+)[ \t]*=[ \t]*(.+),)', re.MULTILINE)
+# A plain array such as const u16 gPokedexOrder_Regional[] = { ... };
+array_regex = re.compile(r'^const\s[\w\s*]*?\b(\w+)\[[^\]\n]*\]\s*=\s*\{(.*?)^\};', re.MULTILINE | re.DOTALL)
+array_item_regex = re.compile(r'^[ \t]*\{?[ \t]*(\w+)', re.MULTILINE)
+number_regex = re.compile(r'\d+\.?\d*')
+char_names = {"_SPACE": " ", "_HYPHEN": "-"}
+
+
+def coerce_value(value):
+    """Convert a C initializer value with no known field type."""
+    if value.isdigit():
+        return int(value)
+    if value.replace('.', '', 1).isdigit():
+        return float(value)
+    if 'PERCENT_FEMALE' in value:
+        # Extract percentage from PERCENT_FEMALE(x)
+        return float(number_regex.search(value).group())
+    if value.startswith('TRUE'):
+        return True
+    if value.startswith('FALSE'):
+        return False
+    return value
+
+
+def to_int(value):
+    return int(value) if value.isdigit() else coerce_value(value)
+
+
+def to_symbol(value):
+    # Symbols such as TYPE_GRASS repeat across every species, so keep one copy of each
+    return sys.intern(value)
+
+
+def to_bool(value):
+    if value.startswith('TRUE'):
+        return True
+    if value.startswith('FALSE'):
+        return False
+    return coerce_value(value)
+
+
+def to_percent(value):
+    if value.startswith('PERCENT_FEMALE'):
+        return float(number_regex.search(value).group())
+    return coerce_value(value)
+
+
+def to_text(value):
+    """Decode a character array such as {_S, _e, _e, _d, _END, _SPACE}."""
+    text = []
+    for char in value.strip("{}").split(","):
+        char = char.strip()
+        if char == "_END":
+            break
+        text.append(char_names.get(char, char[1:]))
+    return "".join(text)
+
+
+def read_source(file_path):
+    with open(file_path, 'r') as file:
+        return file.read()
+
+
+def iter_struct_table(file_path, index_prefix, converters=None):
+    """Yield (key, fields) for each [PREFIX_KEY] = { .field = value, } entry.
+
+    The file is tokenized in a single regex pass and each field value is
+    converted through converters, a dictionary of field name to conversion function.
+    Fields missing from it fall back to coerce_value.
+    """
+    if converters is None:
+        converters = {}
+    prefix_len = len(index_prefix)
+    current_key = None
+    current_fields = None
+
+    for match in initializer_regex.finditer(read_source(file_path)):
+        index, _, field, value = match.groups()
+        if index is not None:
+            if not index.startswith(index_prefix):
+                continue
+            if current_key is not None:
+                yield current_key, current_fields
+            current_key = index[prefix_len:].replace(index_prefix, "")
+            current_fields = {}
+        elif current_key is not None:
+            # Every entry repeats the same field names, so keep one copy of each
+            current_fields[sys.intern(field)] = converters.get(field, coerce_value)(value)
+
+    if current_key is not None:
+        yield current_key, current_fields
+
+
+def parse_struct_table(file_path, index_prefix, converters=None):
+    return dict(iter_struct_table(file_path, index_prefix, converters))
+
+
+def iter_index_table(file_path, index_prefix, value_prefix=""):
+    """Yield (key, value) for each [PREFIX_KEY] = VALUE, initializer."""
+    prefix_len = len(index_prefix)
+    value_prefix_len = len(value_prefix)
+    for match in initializer_regex.finditer(read_source(file_path)):
+        index, value = match.group(1, 2)
+        if index is None or value is None or not index.startswith(index_prefix):
+            continue
+        if value.startswith(value_prefix):
+            value = value[value_prefix_len:]
+        yield index[prefix_len:], value
+
+
+def iter_array_tables(file_path, item_prefix=""):
+    """Yield (name, items) for each const array in the file.
+
+    Items are the leading symbol of each line, so an array of structs such
+    as {gGrasslandPage1, ARRAY_COUNT(gGrasslandPage1)}, yields its first
+    member. item_prefix is stripped from the items that start with it.
+    """
+    prefix_len = len(item_prefix)
+    for match in array_regex.finditer(read_source(file_path)):
+        items = [item[prefix_len:] if item.startswith(item_prefix) else item
+                 for item in array_item_regex.findall(match.group(2))]
+        yield match.group(1), items
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from convert.model import RecordArray
+from convert.ndjson import load_ndjson
+
+shared_keys = ["learnset", "tm", "tutor", "egg_moves"]
+shared_lists_file = "learnsets.json"
+ref_key = "$ref"
+
+
+def list_id(values):
+    """Return the content address of a list: a hash of its compact JSON."""
+    data = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def dedupe_lists(pokedex, keys=shared_keys):
+    """Replace shared move lists with {"$ref": id} references.
+
+    Returns a new pokedex of shallow-copied entries and the table of id to
+    list. Forms that share a learnset object only hash it once.
+    """
+    table = {}
+    deduped = dict(iter_deduped(pokedex.items(), table, keys))
+    return deduped, table
+
+
+def iter_deduped(entries, table, keys=shared_keys):
+    """Yield the (species, entry) pairs of entries as dedupe_lists returns them.
+
+    Each list is added to table as it is first seen, so table is only
+    complete once every entry has been yielded.
+    """
+    ids_by_object = {}
+    for species, entry in entries:
+        entry = dict(entry)
+        for key in keys:
+            values = entry.get(key)
+            if not isinstance(values, (list, RecordArray)):
+                continue
+            try:
+                values_id = ids_by_object[id(values)][0]
+            except KeyError:
+                rows = values.to_json() if isinstance(values, RecordArray) else values
+                values_id = list_id(rows)
+                # Keep the list alive so its id() is not reused while we run
+                ids_by_object[id(values)] = (values_id, values)
+                table.setdefault(values_id, rows)
+            entry[key] = {ref_key: values_id}
+        yield species, entry
+
+
+def is_ref(value):
+    return isinstance(value, dict) and len(value) == 1 and ref_key in value
+
+
+class SharedLists:
+    """Lazily loaded table of shared lists written by dedupe_lists, as .json or .ndjson."""
+
+    def __init__(self, path):
+        self.path = path
+        self._table = None
+
+    @property
+    def table(self):
+        if self._table is None:
+            if self.path.endswith(".ndjson"):
+                self._table = load_ndjson(self.path)
+            else:
+                with open(self.path, "r") as file:
+                    self._table = json.load(file)
+        return self._table
+
+    def resolve(self, value):
+        return self.table[value[ref_key]] if is_ref(value) else value
+
+    def load_entry(self, path):
+        with open(path, "r") as file:
+            return LazyEntry(json.load(file), self)
+
+
+class LazyEntry(dict):
+    """Species entry that resolves shared list references on first access."""
+
+    def __init__(self, entry, shared_lists):
+        super().__init__(entry)
+        self.shared_lists = shared_lists
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if is_ref(value):
+            value = self.shared_lists.resolve(value)
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def resolved(self):
+        """Return a plain dictionary with every reference resolved."""
+        return dict(self.items())
+
+
+def load_species(pokedex_dir, species, shared_lists=None):
+    """Load one species file from a deduplicated output directory."""
+    if shared_lists is None:
+        shared_lists = SharedLists(os.path.join(os.path.dirname(pokedex_dir), shared_lists_file))
+    return shared_lists.load_entry(os.path.join(pokedex_dir, species + ".json"))
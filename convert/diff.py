@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from convert.dedupe import SharedLists, shared_lists_file
+from convert.model import to_plain
+from convert.output import iter_json_blocks
+from convert.pokedex import base_stats_fields
+
+# Changelog groups for species fields; anything else is reported as "info"
+field_groups = {
+    "stats": list(base_stats_fields),
+    "learnset": ["learnset", "egg_moves"],
+    "tm/tutor": ["tm", "tutor"],
+    "evolutions": ["evolve_to", "evolve_from"],
+    "locations": ["location"],
+}
+other_group = "info"
+group_of = {field: group for group, group_fields in field_groups.items() for field in group_fields}
+
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def text_hash(data, indent, compact=False):
+    """Hash data as main.py writes it, without building the whole text."""
+    digest = hashlib.sha1()
+    for block in iter_json_blocks(data, indent, compact):
+        digest.update(block.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def json_hash(value):
+    return content_hash(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def load_json(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+class BuildSource:
+    """One side of a diff: an output directory or in-memory pipeline results.
+
+    species_hashes maps every species to the hash of its output file, and
+    table_hashes does the same for moves.json and locations.json. Pipeline
+    results are hashed as main.py would write them, so entries with equal
+    hashes are skipped without being parsed or compared.
+    """
+
+    def __init__(self, species_hashes, load_species, load_moves, load_locations,
+                 table_hashes=None):
+        self.species_hashes = species_hashes
+        self.table_hashes = table_hashes or {}
+        self.load_species = load_species
+        self.load_moves = load_moves
+        self.load_locations = load_locations
+
+    @classmethod
+    def from_directory(cls, directory):
+        pokedex_dir = os.path.join(directory, "pokedex")
+        hashes = {}
+        if os.path.isdir(pokedex_dir):
+            with os.scandir(pokedex_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json"):
+                        with open(entry.path, "rb") as file:
+                            hashes[entry.name[:-len(".json")]] = content_hash(file.read())
+
+        table_hashes = {}
+        for name in ["moves.json", "locations.json"]:
+            try:
+                with open(os.path.join(directory, name), "rb") as file:
+                    table_hashes[name] = content_hash(file.read())
+            except FileNotFoundError:
+                pass
+
+        def load_table(name):
+            path = os.path.join(directory, name)
+            return load_json(path) if name in table_hashes else {}
+
+        # Entries written with --dedupe-lists are compared with their lists resolved
+        shared_path = os.path.join(directory, shared_lists_file)
+        shared_lists = SharedLists(shared_path) if os.path.exists(shared_path) else None
+
+        def load_species(species):
+            path = os.path.join(pokedex_dir, species + ".json")
+            if shared_lists is None:
+                return load_json(path)
+            return shared_lists.load_entry(path).resolved()
+
+        return cls(
+            hashes,
+            load_species,
+            lambda: load_table("moves.json"),
+            lambda: load_table("locations.json"),
+            table_hashes,
+        )
+
+    @classmethod
+    def from_data(cls, pokedex, move_data, location_data, compact=False):
+        # JSON object keys are strings, so match the move numbers of moves.json
+        def load_moves():
+            return {category: {str(key): to_plain(value) for key, value in table.items()}
+                    for category, table in move_data.items()}
+
+        return cls(
+            {species: text_hash(entry, 4, compact) for species, entry in pokedex.items()},
+            lambda species: to_plain(pokedex[species]),
+            load_moves,
+            lambda: location_data,
+            {"moves.json": text_hash(move_data, 1),
+             "locations.json": text_hash(location_data, 1)},
+        )
+
+
+def item_key(item):
+    return item if isinstance(item, str) else json.dumps(item, sort_keys=True)
+
+
+def list_changes(old, new):
+    """Return the items added to and removed from a list, in list order."""
+    old_keys = {item_key(item) for item in old}
+    new_keys = {item_key(item) for item in new}
+    changes = {}
+    added = [item for item in new if item_key(item) not in old_keys]
+    removed = [item for item in old if item_key(item) not in new_keys]
+    if added:
+        changes["added"] = added
+    if removed:
+        changes["removed"] = removed
+    return changes
+
+
+def field_changes(old, new):
+    """Return the field-level differences between two dictionaries.
+
+    A field in only one of them is {"added_field": value} or
+    {"removed_field": value}; a changed list is a list_changes result and
+    any other change is [old value, new value].
+    """
+    changes = {}
+    for field in list(old) + [field for field in new if field not in old]:
+        if field not in old:
+            changes[field] = {"added_field": new[field]}
+            continue
+        if field not in new:
+            changes[field] = {"removed_field": old[field]}
+            continue
+        old_value = old[field]
+        new_value = new[field]
+        if old_value == new_value:
+            continue
+        if isinstance(old_value, list) and isinstance(new_value, list):
+            changes[field] = list_changes(old_value, new_value) or {"reordered": True}
+        else:
+            changes[field] = [old_value, new_value]
+    return changes
+
+
+def diff_species(old, new):
+    old_hashes = old.species_hashes
+    new_hashes = new.species_hashes
+    changes = {
+        "added": [species for species in new_hashes if species not in old_hashes],
+        "removed": [species for species in old_hashes if species not in new_hashes],
+    }
+    groups = {group: {} for group in list(field_groups) + [other_group]}
+    for species in sorted(old_hashes.keys() & new_hashes.keys()):
+        if old_hashes[species] == new_hashes[species]:
+            continue
+        old_entry = old.load_species(species)
+        new_entry = new.load_species(species)
+        if old_entry == new_entry:
+            continue
+        for field, change in field_changes(old_entry, new_entry).items():
+            group = group_of.get(field, other_group)
+            groups[group].setdefault(species, {})[field] = change
+    changes.update(groups)
+    return changes
+
+
+def diff_tables(old, new):
+    """Diff two tables of entries, comparing hashes before fields."""
+    changes = {
+        "added": [key for key in new if key not in old],
+        "removed": [key for key in old if key not in new],
+        "changed": {},
+    }
+    for key in old:
+        if key in new and json_hash(old[key]) != json_hash(new[key]):
+            if isinstance(old[key], dict) and isinstance(new[key], dict):
+                changes["changed"][key] = field_changes(old[key], new[key])
+            elif isinstance(old[key], list) and isinstance(new[key], list):
+                changes["changed"][key] = list_changes(old[key], new[key]) or {"reordered": True}
+            else:
+                changes["changed"][key] = [old[key], new[key]]
+    return changes
+
+
+def flatten(table, depth):
+    """Key nested entries by their path, e.g. {"tm": {"42": x}} -> {"tm/42": x}."""
+    if depth <= 1:
+        return dict(table)
+    return {f"{key}/{path}": value for key, nested in table.items()
+            for path, value in flatten(nested, depth - 1).items()}
+
+
+def diff_builds(old, new):
+    """Return a changelog of species, move and route changes between two builds."""
+    def diff_table(name, load, depth):
+        old_hash = old.table_hashes.get(name)
+        if old_hash is not None and old_hash == new.table_hashes.get(name):
+            return {"added": [], "removed": [], "changed": {}}
+        return diff_tables(flatten(load(old), depth), flatten(load(new), depth))
+
+    return {
+        "species": diff_species(old, new),
+        "moves": diff_table("moves.json", lambda build: build.load_moves(), 2),
+        "routes": diff_table("locations.json", lambda build: build.load_locations(), 3),
+    }
+
+
+def format_value(value):
+    return value if isinstance(value, str) else json.dumps(value, separators=(",", ":"))
+
+
+def format_change(field, change):
+    if isinstance(change, list):
+        return f"{field} {format_value(change[0])} -> {format_value(change[1])}"
+    if "added_field" in change:
+        return f"{field} added: {format_value(change['added_field'])}"
+    if "removed_field" in change:
+        return f"{field} removed (was {format_value(change['removed_field'])})"
+    parts = [f"+{format_value(item)}" for item in change.get("added", [])]
+    parts += [f"-{format_value(item)}" for item in change.get("removed", [])]
+    if change.get("reordered"):
+        parts.append("reordered")
+    return f"{field} {' '.join(parts)}"
+
+
+def is_list_change(change):
+    return isinstance(change, dict) and set(change) <= {"added", "removed", "reordered"}
+
+
+def format_changelog(changes):
+    """Render a changelog from diff_builds as grouped text lines."""
+    lines = []
+    species = changes["species"]
+    for kind in ["added", "removed"]:
+        if species[kind]:
+            lines.append(f"species {kind}: {', '.join(species[kind])}")
+    for group in list(field_groups) + [other_group]:
+        if species[group]:
+            lines.append(f"{group}:")
+            for name, fields in species[group].items():
+                lines.append(f"  {name}: " + "; ".join(
+                    format_change(field, change) for field, change in fields.items()))
+    for section in ["moves", "routes"]:
+        table = changes[section]
+        for kind in ["added", "removed"]:
+            if table[kind]:
+                lines.append(f"{section} {kind}: {', '.join(table[kind])}")
+        if table["changed"]:
+            lines.append(f"{section}:")
+            for key, change in table["changed"].items():
+                if is_list_change(change) or isinstance(change, list):
+                    detail = format_change("", change).strip()
+                else:
+                    detail = "; ".join(format_change(field, value) for field, value in change.items())
+                lines.append(f"  {key}: {detail}")
+    return "\n".join(lines) + "\n" if lines else "No changes\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two output directories written by main.py.")
+    parser.add_argument("old", help="output directory of the earlier build")
+    parser.add_argument("new", help="output directory of the later build")
+    parser.add_argument("--json", metavar="FILE", help="also save the changelog as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    changes = diff_builds(BuildSource.from_directory(args.old), BuildSource.from_directory(args.new))
+    sys.stdout.write(format_changelog(changes))
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(changes, file, indent=1)
+    print(f"Compared in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
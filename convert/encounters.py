@@ -0,0 +1,137 @@
+from bisect import bisect_left, bisect_right
+from convert.locations import area_levels, area_tag
+from convert.model import SpeciesEncounter, bit_ids
+
+index_fields = ("species", "route", "method", "tag")
+# Tag of the rows listed under a method with no area header
+default_tag = "default"
+
+
+class EncounterIndex:
+    """Every (species, route, method, area) encounter stored once, with bitset indexes.
+
+    Each distinct row gets a dense integer id, and the species, route,
+    method and area tag indexes map every value to a Python int with bit
+    id set for each row that has it. Rows in a floor area also have the
+    floors they cover, indexed by floor in level order so a level range
+    is a bisected slice of bitsets. select() ANDs the filters of different
+    fields and ORs the values given for one field.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.row_ids = {}
+        self.bitsets = {field: {} for field in index_fields}
+        self.levels = {}
+        self.by_level = []
+
+    @classmethod
+    def from_location_data(cls, location_data):
+        """Index the route -> method -> area -> species table of locations.json."""
+        index = cls()
+        for route, route_entry in location_data.items():
+            for method, method_entry in route_entry.items():
+                for area, area_entry in method_entry.items():
+                    for species in area_entry:
+                        index.add(species, route, method, area)
+        index.build_levels()
+        return index
+
+    @classmethod
+    def from_json(cls, data):
+        """Rebuild the index from the rows of an encounters.json export.
+
+        data may also be load_ndjson() of encounters.ndjson, whose rows are
+        a dictionary of row id to row.
+        """
+        index = cls()
+        rows = data["rows"]
+        if isinstance(rows, dict):
+            rows = [rows[row_id] for row_id in sorted(rows)]
+        for row in rows:
+            index.add(row["species"], row["route"], row["method"], row["area"])
+        index.build_levels()
+        return index
+
+    def add(self, species, route, method, area):
+        key = (species, route, method, area)
+        if key in self.row_ids:
+            return self.row_ids[key]
+        row_id = len(self.rows)
+        self.row_ids[key] = row_id
+        self.rows.append(SpeciesEncounter(species, route, method, area))
+
+        bit = 1 << row_id
+        values = zip(index_fields, (species, route, method, area_tag(area) or default_tag))
+        for field, value in values:
+            bitsets = self.bitsets[field]
+            bitsets[value] = bitsets.get(value, 0) | bit
+        levels = area_levels(area)
+        if levels is not None:
+            self.levels[row_id] = levels
+        return row_id
+
+    def build_levels(self):
+        """Rebuild the per-floor bitsets after rows are added."""
+        floors = {}
+        for row_id, levels in self.levels.items():
+            for level in levels:
+                floors[level] = floors.get(level, 0) | 1 << row_id
+        # by_level[i] is (level, rows with a floor at level), by increasing level
+        self.by_level = sorted(floors.items())
+
+    def matching(self, field, values):
+        """Return the bitset of rows whose field is any of values."""
+        if isinstance(values, str):
+            values = [values]
+        bits = 0
+        for value in values:
+            bits |= self.bitsets[field].get(value, 0)
+        return bits
+
+    def level_range(self, min_level=None, max_level=None):
+        """Return the bitset of floor rows with a floor within min_level..max_level."""
+        start = 0
+        end = len(self.by_level)
+        if min_level is not None:
+            start = bisect_left(self.by_level, (min_level,))
+        if max_level is not None:
+            end = bisect_right(self.by_level, (max_level, float("inf")))
+        bits = 0
+        for _, level_bits in self.by_level[start:end]:
+            bits |= level_bits
+        return bits
+
+    def select(self, species=(), routes=(), methods=(), tags=(), min_level=None, max_level=None):
+        """Return the bitset of rows matching every given filter.
+
+        Each of species, routes, methods and tags is a value or a list of
+        values, any of which may match. A level bound keeps only rows in
+        floor areas, e.g. max_level=2 is everything found below 3F.
+        """
+        bits = (1 << len(self.rows)) - 1
+        for field, values in zip(index_fields, (species, routes, methods, tags)):
+            if values:
+                bits &= self.matching(field, values)
+        if min_level is not None or max_level is not None:
+            bits &= self.level_range(min_level, max_level)
+        return bits
+
+    def find(self, **filters):
+        """Return the rows matching the select() filters, in id order."""
+        return [self.rows[row_id] for row_id in bit_ids(self.select(**filters))]
+
+    def values(self, field):
+        """Return each value of an indexed field and its number of rows."""
+        return {value: bits.bit_count() for value, bits in self.bitsets[field].items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def to_json(self):
+        """Return the rows and the row ids of every indexed value, as written to encounters.json."""
+        data = {"rows": [row.to_json() for row in self.rows]}
+        for field in index_fields:
+            data[field] = {value: bit_ids(bits) for value, bits in self.bitsets[field].items()}
+        data["levels"] = {str(row_id): list(levels) for row_id, levels in self.levels.items()}
+        return data
@@ -13,3 +13,7 @@ def report_error(func, message):
 def save_errors():
     with open(error_file, "w") as file:
         pprint.pprint(errors, file)
+
+
+def clear_errors():
+    errors.clear()
@@ -0,0 +1,83 @@
+from bisect import bisect_right
+from convert.model import SymbolTable
+
+methods = ("levelup", "tm", "tutor", "egg")
+
+
+class MoveLearnerIndex:
+    """Bitsets of the species that can learn each move, per learn method.
+
+    Every species gets a dense integer id and each (move, method) pair
+    stores a Python int with bit id set for every species that learns it.
+    Level-up learners are also kept as cumulative bitsets by level, so a
+    level cap is a bisect and multi-move queries are plain AND/OR.
+    """
+
+    def __init__(self, move_data, egg_moves, species=()):
+        self.species = SymbolTable()
+        for name in species:
+            self.species.code(name)
+        self.bitsets = {method: {} for method in methods}
+        self.levels = {}
+
+        for move, learners in move_data.get("learned", {}).items():
+            by_level = {}
+            for learner in learners:
+                bit = 1 << self.species.code(learner["target"])
+                by_level[learner["level"]] = by_level.get(learner["level"], 0) | bit
+            cumulative = 0
+            levels = []
+            for level in sorted(by_level):
+                cumulative |= by_level[level]
+                levels.append((level, cumulative))
+            self.levels[move] = levels
+            self.bitsets["levelup"][move] = cumulative
+
+        for category in ["tm", "tutor"]:
+            for entry in move_data.get(category, {}).values():
+                bits = 0
+                for name in entry.get("compatibility", []):
+                    bits |= 1 << self.species.code(name)
+                self.bitsets[category][entry["key"]] = self.bitsets[category].get(entry["key"], 0) | bits
+
+        for name, moves in egg_moves.items():
+            bit = 1 << self.species.code(name)
+            for move in moves:
+                self.bitsets["egg"][move] = self.bitsets["egg"].get(move, 0) | bit
+
+    def learners(self, move, learn_methods=methods, max_level=None):
+        """Return the bitset of species that learn move by any of learn_methods."""
+        bits = 0
+        for method in learn_methods:
+            if method == "levelup" and max_level is not None:
+                levels = self.levels.get(move, [])
+                position = bisect_right(levels, (max_level, float("inf")))
+                if position:
+                    bits |= levels[position - 1][1]
+            else:
+                bits |= self.bitsets[method].get(move, 0)
+        return bits
+
+    def learn_all(self, moves, learn_methods=methods, max_level=None):
+        """Return the bitset of species that can learn every one of moves."""
+        bits = (1 << len(self.species)) - 1
+        for move in moves:
+            bits &= self.learners(move, learn_methods, max_level)
+        return bits
+
+    def learn_any(self, moves, learn_methods=methods, max_level=None):
+        """Return the bitset of species that can learn at least one of moves."""
+        bits = 0
+        for move in moves:
+            bits |= self.learners(move, learn_methods, max_level)
+        return bits
+
+    def names(self, bits):
+        """Return the species names set in bits, in id order."""
+        return self.species.select(bits)
+
+
+def move_key(name):
+    """Normalize a move name such as "surf" or "Fire Blast" to MOVE_SURF/MOVE_FIREBLAST."""
+    key = name.upper().replace(" ", "").replace("-", "")
+    return key if key.startswith("MOVE_") else "MOVE_" + key
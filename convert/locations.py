@@ -2,8 +2,10 @@ import os
 import re
 from convert import csv_dir
 from convert.error import report_error
+from convert.model import Encounter
 
 level_re = re.compile(".*[0-9]F.*")
+floor_re = re.compile(r"\b(B?)(\d+)F\b")
 grass_encounters_file = "Pokémon Unbound Location Guide v2.1.1.1 - Grass & Cave Encounters.csv"
 water_encounters_file = "Pokémon Unbound Location Guide v2.1.1.1 - Surfing, Fishing, Rock Smash.csv"
 
@@ -26,28 +28,49 @@ def parse_encounters_csv(csv_file, skip_lines=0):
     return raw_data
 
 
-def check_area(value):
+def area_tag(value):
+    """Return the kind of area header value is, or None if it is not one."""
     if value in ["Inside", "Outside"]:
-        return True
+        return "inside_outside"
     if " Area" in value:
-        return True
+        return "area"
     if "Flowers" in value:
-        return True
+        return "flowers"
     if level_re.match(value):
-        return True
+        return "level"
     if value == "Shadow Basement":
-        return True
+        return "basement"
     if ", " in value:
-        return True
+        return "areas"
     if "Headbutt" in value:
-        return True
+        return "headbutt"
     if " Cave" in value:
-        return True
+        return "cave"
     if value in ["Swarm", "Special Encounter"]:
-        return True
+        return value.split()[0].lower()
     if value in ["Easy", "Medium", "Hard", "Insane"]:
-        return True
-    return False
+        return "difficulty"
+    return None
+
+
+def check_area(value):
+    return area_tag(value) is not None
+
+
+def area_levels(value):
+    """Return the floors of an area such as "1F + 3F" or "B1F - 2F" in order, or None.
+
+    Floors joined by "+" are only those floors, while a "-" range covers
+    every floor between its ends. Basement floors are negative, so B2F is
+    -2, and there is no floor 0.
+    """
+    levels = set()
+    for part in value.split("+"):
+        floors = [-int(number) if basement else int(number)
+                  for basement, number in floor_re.findall(part)]
+        if floors:
+            levels.update(level for level in range(min(floors), max(floors) + 1) if level)
+    return tuple(sorted(levels)) or None
 
 
 def parse_land_columns(raw_data):
@@ -102,12 +125,12 @@ def parse_water_columns(raw_data):
     return data
 
 
-def parse_location_files():
+def parse_location_files(location_dir=csv_dir):
     land_data = parse_land_columns(
-        parse_encounters_csv(os.path.join(csv_dir, grass_encounters_file)),
+        parse_encounters_csv(os.path.join(location_dir, grass_encounters_file)),
     )
     water_data = parse_water_columns(
-        parse_encounters_csv(os.path.join(csv_dir, water_encounters_file),
+        parse_encounters_csv(os.path.join(location_dir, water_encounters_file),
                              skip_lines=2),
     )
     for route in land_data:
@@ -128,37 +151,118 @@ def create_location_lookup(location_data):
                     except KeyError:
                         encounters = []
                         location_lookup[species] = encounters
-                    encounters.append({"route": route, "area": area, "method": method})
+                    encounters.append(Encounter(route, area, method))
     return location_lookup
 
 
-def get_pokemon_key(name, name_lookup):
-    name = name.strip(' \t\u2642\u2640\ufe0f').replace("é", "e")
-    if name.startswith("Alolan"):
-        return name.replace("Alolan ", "").upper() + "_A"
-    if name.startswith("Galarian"):
-        return name.replace("Galarian ", "").upper() + "_G"
-    try:
-        return name_lookup[name]
-    except KeyError:
-        pass
+class SpeciesNameResolver:
+    """Resolve spreadsheet species names to pokedex keys.
+
+    The display name, key and regional prefix lookups are built once from
+    the pokedex and every raw name is memoized. A display name shared by
+    several species resolves to its base key, the one without a form
+    suffix. Names that match no species, and shared names with no base key
+    (which resolve to their first form in pokedex order), are collected so
+    they can be reported together.
+    """
+
+    regional_prefixes = {"Alolan ": "_A", "Galarian ": "_G"}
+
+    def __init__(self, pokedex):
+        self.name_keys = {}
+        for key, entry in pokedex.items():
+            if "name" in entry:
+                self.name_keys.setdefault(entry["name"], []).append(key)
+        self.name_lookup = {}
+        self.shared_names = set()
+        for name, keys in self.name_keys.items():
+            key = self.base_key(name, keys)
+            if key is None:
+                forms = [key for key in keys if key.startswith(self.spelled_key(name) + "_")]
+                key = (forms or keys)[0]
+                self.shared_names.add(name)
+            self.name_lookup[name] = key
+        self.keys = set(self.name_lookup.values())
+        self.memo = {}
+        self.unmatched = {}
+        self.ambiguous = {}
+
+    @staticmethod
+    def spelled_key(name):
+        """Return the key spelled like a display name, e.g. MR_MIME for "Mr. Mime"."""
+        return re.sub(r"\W", "", re.sub(r"[ -]", "_", name.upper()))
+
+    @classmethod
+    def base_key(cls, name, keys):
+        """Return the key a display name shared by keys refers to, or None if it is ambiguous.
+
+        That is the key spelled like the name, or else the key every other
+        one extends with a form suffix.
+        """
+        if len(keys) == 1:
+            return keys[0]
+        if cls.spelled_key(name) in keys:
+            return cls.spelled_key(name)
+        for key in keys:
+            if all(other == key or other.startswith(key + "_") for other in keys):
+                return key
+        return None
+
+    def normalize(self, name):
+        return name.strip(' \t\u2642\u2640\ufe0f').replace("e\u0301", "e")
+
+    def match(self, name):
+        for prefix, suffix in self.regional_prefixes.items():
+            if name.startswith(prefix.strip()):
+                return name.replace(prefix, "").upper() + suffix
+        try:
+            key = self.name_lookup[name]
+        except KeyError:
+            pass
+        else:
+            if name in self.shared_names:
+                self.ambiguous[name] = self.name_keys[name]
+            return key
+
+        candidate_key = name.upper().split(" ")[0]
+        if candidate_key in self.keys:
+            return candidate_key
+        return None
+
+    def resolve(self, raw_name):
+        try:
+            key, matched = self.memo[raw_name]
+        except KeyError:
+            name = self.normalize(raw_name)
+            key = self.match(name)
+            matched = key is not None
+            if not matched:
+                key = name
+                self.unmatched.setdefault(name, 0)
+            self.memo[raw_name] = key, matched
+        if not matched:
+            self.unmatched[key] += 1
+        return key
 
-    candidate_key = name.upper().split(" ")[0]
-    if candidate_key in name_lookup.values():
-        return candidate_key
-    else:
-        report_error("get_pokemon_key", f"Could not match species name: {name}")
-        return name
+    def report(self):
+        """Report unmatched and ambiguous names in a single error entry."""
+        if self.unmatched or self.ambiguous:
+            report_error("update_pokemon_names", {
+                "unmatched": dict(self.unmatched),
+                "ambiguous": dict(self.ambiguous),
+            })
 
 
 def update_pokemon_names(location_data, pokedex):
-    name_lookup = {entry["name"]: key for key, entry in pokedex.items() if "name" in entry}
+    resolver = SpeciesNameResolver(pokedex)
     for route, route_entry in location_data.items():
         for method, method_entry in route_entry.items():
             for area, area_entry in method_entry.items():
                 location_data[route][method][area] = [
-                    get_pokemon_key(species, name_lookup) for species in area_entry
+                    resolver.resolve(species) for species in area_entry
                 ]
+    resolver.report()
+    return resolver
 
 
 if __name__ == "__main__":
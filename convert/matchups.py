@@ -0,0 +1,166 @@
+import numpy as np
+
+# Attacking type to the defending types it hits for 2x, 0.5x and 0x.
+# TYPE_MYSTERY is the "???" type and is neutral in both directions.
+effectiveness = {
+    "NORMAL": ("", "ROCK STEEL", "GHOST"),
+    "FIGHTING": ("NORMAL ICE ROCK DARK STEEL", "POISON FLYING PSYCHIC BUG FAIRY", "GHOST"),
+    "FLYING": ("GRASS FIGHTING BUG", "ELECTRIC ROCK STEEL", ""),
+    "POISON": ("GRASS FAIRY", "POISON GROUND ROCK GHOST", "STEEL"),
+    "GROUND": ("FIRE ELECTRIC POISON ROCK STEEL", "GRASS BUG", "FLYING"),
+    "ROCK": ("FIRE ICE FLYING BUG", "FIGHTING GROUND STEEL", ""),
+    "BUG": ("GRASS PSYCHIC DARK", "FIRE FIGHTING POISON FLYING GHOST STEEL FAIRY", ""),
+    "GHOST": ("PSYCHIC GHOST", "DARK", "NORMAL"),
+    "STEEL": ("ICE ROCK FAIRY", "FIRE WATER ELECTRIC STEEL", ""),
+    "FIRE": ("GRASS ICE BUG STEEL", "FIRE WATER ROCK DRAGON", ""),
+    "WATER": ("FIRE GROUND ROCK", "WATER GRASS DRAGON", ""),
+    "GRASS": ("WATER GROUND ROCK", "FIRE GRASS POISON FLYING BUG DRAGON STEEL", ""),
+    "ELECTRIC": ("WATER FLYING", "ELECTRIC GRASS DRAGON", "GROUND"),
+    "PSYCHIC": ("FIGHTING POISON", "PSYCHIC STEEL", "DARK"),
+    "ICE": ("GRASS GROUND FLYING DRAGON", "FIRE WATER ICE STEEL", ""),
+    "DRAGON": ("DRAGON", "STEEL", "FAIRY"),
+    "DARK": ("PSYCHIC GHOST", "FIGHTING DARK FAIRY", ""),
+    "FAIRY": ("FIGHTING DRAGON DARK", "FIRE POISON STEEL", ""),
+    "MYSTERY": ("", "", ""),
+}
+types = ["TYPE_" + name for name in effectiveness]
+type_codes = {type_name: code for code, type_name in enumerate(types)}
+neutral_code = type_codes["TYPE_MYSTERY"]
+learn_keys = ["learnset", "tm", "tutor", "egg_moves"]
+
+
+def build_type_chart():
+    """Return the attacker x defender multiplier matrix over types."""
+    chart = np.ones((len(types), len(types)), dtype=np.float32)
+    for attacker, groups in effectiveness.items():
+        for multiplier, defenders in zip([2.0, 0.5, 0.0], groups):
+            for defender in defenders.split():
+                chart[type_codes["TYPE_" + attacker], type_codes["TYPE_" + defender]] = multiplier
+    return chart
+
+
+def build_dual_chart(chart):
+    """Return the attacker x type1 x type2 multipliers for every type pair.
+
+    A mono-type defender is the pair (type, type) and only counts its type once.
+    """
+    dual = chart[:, :, None] * chart[:, None, :]
+    codes = np.arange(len(types))
+    dual[:, codes, codes] = chart
+    return dual
+
+
+def type_code(type_name):
+    return type_codes.get(type_name, neutral_code)
+
+
+class TypeMatchups:
+    """Defensive profiles and offensive coverage for every species at once.
+
+    defense[s, a] is the multiplier species s takes from attack type a.
+    learnable[s, a] is set when s learns a move of type a. coverage[s, c]
+    is the best multiplier s deals to the defending type pair combos[c],
+    where combos are the distinct type pairs in the dex, weighted by how
+    many species share them.
+    """
+
+    def __init__(self, species, type1, type2, learnable, chart=None):
+        self.species = species
+        self.species_codes = {name: index for index, name in enumerate(species.tolist())}
+        self.type1 = type1
+        self.type2 = type2
+        self.learnable = learnable
+        self.chart = build_type_chart() if chart is None else chart
+        self.dual = build_dual_chart(self.chart)
+        self.defense = self.dual[:, type1, type2].T
+
+        pairs = np.stack([type1, type2], axis=1)
+        self.combos, self.species_combo, self.combo_counts = np.unique(
+            pairs, axis=0, return_inverse=True, return_counts=True)
+        self.species_combo = self.species_combo.reshape(-1)
+        combo_chart = self.dual[:, self.combos[:, 0], self.combos[:, 1]]
+        self.coverage = np.max(np.where(learnable[:, :, None], combo_chart[None], 0), axis=1)
+
+    @classmethod
+    def from_pokedex(cls, pokedex, move_types=None):
+        """Build the matrices from merged pokedex entries.
+
+        move_types maps move keys such as MOVE_SURF to their type. The
+        source tables do not include move types, so without it each species
+        is only credited with attacks of its own types (STAB coverage).
+        """
+        entries = list(pokedex.values())
+        species = np.array(list(pokedex), dtype=str)
+        type1 = np.array([type_code(entry.get("type1")) for entry in entries], dtype=np.intp)
+        type2 = np.array([type_code(entry.get("type2", entry.get("type1"))) for entry in entries],
+                         dtype=np.intp)
+        learnable = np.zeros((len(entries), len(types)), dtype=bool)
+        if move_types is None:
+            learnable[np.arange(len(entries)), type1] = True
+            learnable[np.arange(len(entries)), type2] = True
+        else:
+            move_codes = {move: type_code(type_name) for move, type_name in move_types.items()}
+            for index, entry in enumerate(entries):
+                for key in learn_keys:
+                    for move in entry.get(key, []):
+                        move = move if isinstance(move, str) else move["move"]
+                        if move in move_codes:
+                            learnable[index, move_codes[move]] = True
+        learnable[:, neutral_code] = False
+        return cls(species, type1, type2, learnable)
+
+    def __len__(self):
+        return len(self.species)
+
+    def names(self, mask):
+        return self.species[mask].tolist()
+
+    def profile(self, species):
+        """Return attack type to the multiplier species takes from it."""
+        row = self.defense[self.species_codes[species]]
+        return {type_name: float(row[code]) for code, type_name in enumerate(types)
+                if code != neutral_code}
+
+    def where(self, resists=(), weak_to=(), immune_to=(), learns=()):
+        """Return a mask of species matching every condition.
+
+        Each argument is a list of type names: resists means below 1x
+        (immunities included), weak_to above 1x, and learns a learnable
+        move of that type.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for type_name in resists:
+            mask &= self.defense[:, type_codes[type_name]] < 1
+        for type_name in weak_to:
+            mask &= self.defense[:, type_codes[type_name]] > 1
+        for type_name in immune_to:
+            mask &= self.defense[:, type_codes[type_name]] == 0
+        for type_name in learns:
+            mask &= self.learnable[:, type_codes[type_name]]
+        return mask
+
+    def super_effective_share(self):
+        """Return, for each species, the share of the dex it hits for more than 1x."""
+        return (self.coverage > 1) @ self.combo_counts / len(self)
+
+    def uncovered(self, species):
+        """Return the type pairs that species cannot hit for at least 1x."""
+        row = self.coverage[self.species_codes[species]]
+        return [(types[type1], types[type2]) for (type1, type2), best in zip(self.combos, row)
+                if best < 1]
+
+    def counters(self, target):
+        """Return a mask of species that hit target super effectively and resist its types."""
+        code = self.species_codes[target]
+        mask = self.coverage[:, self.species_combo[code]] > 1
+        for attack_code in {self.type1[code], self.type2[code]}:
+            if attack_code != neutral_code:
+                mask &= self.defense[:, attack_code] < 1
+        return mask
+
+    def rank_coverage(self, mask=None, limit=None):
+        """Return species ordered by super_effective_share, best first."""
+        indices = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        share = self.super_effective_share()[indices]
+        order = np.argsort(-share, kind="stable")
+        return self.species[indices[order][:limit]].tolist()
@@ -0,0 +1,243 @@
+import sys
+from abc import ABC, abstractmethod
+from array import array
+
+
+class SymbolTable:
+    """Interned names with dense integer codes.
+
+    Rows store the code of each name in an array and look the name up here,
+    so every distinct name is held once. A table is pickled along with the
+    rows that refer to it, so codes stay valid across processes.
+    """
+
+    __slots__ = ("names", "codes")
+
+    def __init__(self):
+        self.names = []
+        self.codes = {}
+
+    def code(self, name):
+        try:
+            return self.codes[name]
+        except KeyError:
+            code = len(self.names)
+            name = sys.intern(name)
+            self.names.append(name)
+            self.codes[name] = code
+            return code
+
+    def __getitem__(self, code):
+        return self.names[code]
+
+    def __len__(self):
+        return len(self.names)
+
+    def select(self, bits):
+        """Return the names whose codes are set in the bitset bits, in code order."""
+        names = self.names
+        return [names[code] for code in bit_ids(bits)]
+
+    def __getstate__(self):
+        return self.names
+
+    def __setstate__(self, names):
+        self.names = names
+        self.codes = {name: code for code, name in enumerate(names)}
+
+
+def bit_ids(bits):
+    """Return the ids set in the bitset bits, in increasing order."""
+    ids = []
+    while bits:
+        low_bit = bits & -bits
+        ids.append(low_bit.bit_length() - 1)
+        bits ^= low_bit
+    return ids
+
+
+class Record:
+    """Base for slotted rows that read like the dictionaries they replace.
+
+    row["level"] and row.level are the same field, and to_json() returns
+    the dictionary written to the output files, with fields in slot order.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def to_json(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_json()
+        return self.to_json() == other
+
+    # Rows are mutable and compare equal to the dictionaries they replace,
+    # which are unhashable, so rows are left unhashable as well
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()})"
+
+
+class LevelUpMove(Record):
+    __slots__ = ("level", "move")
+
+
+class Learner(Record):
+    __slots__ = ("target", "level")
+
+
+class Encounter(Record):
+    __slots__ = ("route", "area", "method")
+
+
+class SpeciesEncounter(Record):
+    __slots__ = ("species", "route", "method", "area")
+
+
+class NameArray:
+    """Array-backed list of names, stored as codes into a SymbolTable.
+
+    Iterates, compares and serializes like the list of names it replaces.
+    """
+
+    __slots__ = ("symbols", "codes")
+
+    def __init__(self, symbols, codes=None):
+        self.symbols = symbols
+        self.codes = array("I") if codes is None else codes
+
+    def append(self, name):
+        self.codes.append(self.symbols.code(name))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        names = self.symbols.names
+        for code in self.codes:
+            yield names[code]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self.symbols[self.codes[index]]
+
+    def to_json(self):
+        return list(self)
+
+    def __eq__(self, other):
+        if isinstance(other, (NameArray, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()})"
+
+
+class RecordArray(ABC):
+    """Array-backed list of rows with one name column and one level column.
+
+    Names are stored as codes into a SymbolTable shared by every list built
+    from the same source, and levels as unsigned shorts. Iterating yields
+    the rows built by row(), which are created on demand and not kept.
+    """
+
+    __slots__ = ("symbols", "codes", "levels")
+
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.codes = array("I")
+        self.levels = array("H")
+
+    def append(self, name, level):
+        self.codes.append(self.symbols.code(name))
+        self.levels.append(level)
+
+    @abstractmethod
+    def row(self, name, level):
+        """Return the record for one name and level."""
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        names = self.symbols.names
+        for code, level in zip(self.codes, self.levels):
+            yield self.row(names[code], level)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        return self.row(self.symbols[self.codes[index]], self.levels[index])
+
+    def to_json(self):
+        return [row.to_json() for row in self]
+
+    def __eq__(self, other):
+        if isinstance(other, (RecordArray, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_json()})"
+
+
+class Learnset(RecordArray):
+    """A species' level-up moves in learn order."""
+
+    __slots__ = ()
+
+    def row(self, move, level):
+        return LevelUpMove(level, move)
+
+    def to_json(self):
+        names = self.symbols.names
+        return [{"level": level, "move": names[code]} for code, level in zip(self.codes, self.levels)]
+
+
+class Learners(RecordArray):
+    """The species learning one move by level up, with the level they learn it."""
+
+    __slots__ = ()
+
+    def row(self, target, level):
+        return Learner(target, level)
+
+    def to_json(self):
+        names = self.symbols.names
+        return [{"target": names[code], "level": level} for code, level in zip(self.codes, self.levels)]
+
+
+def to_json(value):
+    """json.dumps default hook writing model objects as the lists and dictionaries they replace."""
+    try:
+        return value.to_json()
+    except AttributeError:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable") from None
+
+
+def to_plain(value):
+    """Return value with every model object replaced by plain lists and dictionaries."""
+    if isinstance(value, dict):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if isinstance(value, (Record, RecordArray, NameArray)):
+        return to_plain(value.to_json())
+    return value
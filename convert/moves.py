@@ -1,18 +1,22 @@
 import os
 import re
-from convert import c_dir, dst_dir
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from convert import c_dir, dst_dir, run_stage
+from convert.model import Learners, Learnset, NameArray, SymbolTable
 
 tm_list = os.path.join(c_dir, "src/TM_Tutor_Tables.c")
 tm_compatibilities = os.path.join(c_dir, "src/tm_compatibility")
 tutor_compatibilities = os.path.join(c_dir, "src/tutor_compatibility")
 learnsets = os.path.join(c_dir, "src/Learnsets.c")
+compatibility_read_workers = 8
 
 
-def parse_tm_tutor_file():
+def parse_tm_tutor_file(file_path=tm_list):
     # Regex to match and capture the MOVE_ value and the number after the //
     pattern = r'(MOVE_\w+),\s*//(\d+)'
 
-    with open(tm_list) as file:
+    with open(file_path) as file:
         data = {}
         category = None
         for line in file.readlines():
@@ -38,14 +42,15 @@ def parse_tm_tutor_file():
         return data
 
 
-def parse_learnsets():
-    """Parse the level up moves from the file and return a dictionary of learnset names to move data."""
+def parse_learnsets(file_path=learnsets):
+    """Parse the level up moves from the file and return a dictionary of species to Learnset."""
     level_up_moves_data = {}
     current_learnset_name = None
-    current_moveset = []
+    move_names = SymbolTable()
+    current_moveset = Learnset(move_names)
     species_map = {}
 
-    with open(learnsets, 'r') as file:
+    with open(file_path, 'r') as file:
         start_collecting = False
         for line in file:
             line = line.strip()
@@ -54,7 +59,7 @@ def parse_learnsets():
             pokemon_match = re.match(r'static const struct LevelUpMove s(\w+)LevelUpLearnset\[\] = {', line)
             if pokemon_match:
                 current_learnset_name = f's{pokemon_match.group(1)}LevelUpLearnset'
-                current_moveset = []
+                current_moveset = Learnset(move_names)
                 continue
 
             # Match the LEVEL_UP_MOVE entries
@@ -62,7 +67,7 @@ def parse_learnsets():
             if move_match:
                 level = int(move_match.group(1))
                 move = move_match.group(2)
-                current_moveset.append({"level": level, "move": move})
+                current_moveset.append(move, level)
                 continue
 
             # Match the LEVEL_UP_END entry (end of the learnset)
@@ -70,7 +75,7 @@ def parse_learnsets():
                 if current_learnset_name:
                     level_up_moves_data[current_learnset_name] = current_moveset
                 current_learnset_name = None
-                current_moveset = []
+                current_moveset = Learnset(move_names)
                 continue
 
             # Start collecting species map after the correct declaration
@@ -96,52 +101,121 @@ def parse_learnsets():
     return final_data
 
 
-def convert_txt_file(file_path):
-    data = {}
-    with open(file_path, 'r') as file:
-        for line in file.readlines():
-            line = line.strip()
-            if not data:
-                _, name = line.split(": ")
-                data["name"] = name
-                data["compatibility"] = []
-                continue
+class CompatibilityTable:
+    """The compatibility lists of one tm/tutor directory.
+
+    Species names are interned once in species and each move number maps to
+    its name and a NameArray of species codes, in file order. items() yields
+    {"name": ..., "compatibility": NameArray} for each move.
+    """
 
+    def __init__(self):
+        self.species = SymbolTable()
+        self.moves = {}
+
+    def add(self, move_num, text):
+        """Add a move from the text of its "NN - Move Name.txt" file."""
+        header, _, body = text.partition("\n")
+        _, name = header.strip().split(": ")
+        species_code = self.species.code
+        codes = array("I")
+        for line in body.split("\n"):
+            line = line.strip()
             if line:
-                data["compatibility"].append(line)
+                codes.append(species_code(line))
+        self.moves[move_num] = (name, NameArray(self.species, codes))
 
-    return data
+    def compatibility(self, move_num):
+        return self.moves[move_num][1]
 
+    def items(self):
+        for move_num, (name, compatibility) in self.moves.items():
+            yield move_num, {"name": name, "compatibility": compatibility}
 
-def build_compatibility_table(move_dir):
-    data = {}
-    for root, dirs, files in os.walk(move_dir):
-        for file in files:
-            if file.endswith(".txt"):
-                move_num = int(file.split(" - ")[0])
-                data[move_num] = convert_txt_file(os.path.join(root, file))
-    return data
+    def __contains__(self, move_num):
+        return move_num in self.moves
+
+    def __len__(self):
+        return len(self.moves)
+
+
+def read_text(path):
+    with open(path, 'r') as file:
+        return file.read()
 
 
-def add_compatibilities(move_data):
-    # Merge the compatibility tables into the TM_Tutor base table
+def scan_compatibility_dir(move_dir):
+    """List the (move number, path) of each "NN - Move Name.txt" file in move_dir with one os.scandir call."""
+    with os.scandir(move_dir) as entries:
+        return [(int(entry.name.split(" - ")[0]), entry.path)
+                for entry in entries if entry.name.endswith(".txt") and entry.is_file()]
+
+
+def build_compatibility_table(move_dir):
+    """Load every compatibility file in move_dir into a CompatibilityTable.
+
+    The files are read by a thread pool. Under --incremental the table is
+    cached by StageCache, whose fingerprint only reads the files whose size
+    or modification time changed, so later runs do not open them.
+    """
+    files = scan_compatibility_dir(move_dir)
+    table = CompatibilityTable()
+    with ThreadPoolExecutor(max_workers=compatibility_read_workers) as executor:
+        texts = executor.map(read_text, [path for _, path in files])
+        for (move_num, _), text in zip(files, texts):
+            table.add(move_num, text)
+    return table
+
+
+def build_compatibility_index(move_data):
+    """Invert the TM/tutor compatibility lists into species -> move numbers.
+
+    Each species maps to {"tm": [...], "tutor": [...]} holding the move
+    numbers in table order, so a pokedex entry needs a single lookup.
+    """
+    index = {}
+    for category in ["tm", "tutor"]:
+        for move_num, entry in move_data[category].items():
+            for species in entry.get("compatibility", []):
+                species_moves = index.setdefault(species, {"tm": [], "tutor": []})[category]
+                if not species_moves or species_moves[-1] != move_num:
+                    species_moves.append(move_num)
+    return index
+
+
+def add_compatibilities(move_data, stage_cache=None):
+    return merge_compatibilities(
+        move_data,
+        run_stage(stage_cache, build_compatibility_table, [tm_compatibilities], tm_compatibilities),
+        run_stage(stage_cache, build_compatibility_table, [tutor_compatibilities], tutor_compatibilities),
+    )
+
+
+def merge_compatibilities(move_data, tm_table, tutor_table):
+    # Merge the compatibility tables into the TM_Tutor base table. The lists
+    # stay NameArrays and are only written out as names by to_json().
     for category, table in [
-        ("tm", build_compatibility_table(tm_compatibilities).items()),
-        ("tutor", build_compatibility_table(tutor_compatibilities).items()),
+        ("tm", tm_table.items()),
+        ("tutor", tutor_table.items()),
     ]:
         for move_num, compatibility in table:
             if move_num in move_data[category]:
                 for key in compatibility:
                     move_data[category][move_num][key] = compatibility[key]
+    return build_compatibility_index(move_data)
 
 
 def add_learned_moves(move_data, learnsets):
     learned_moves = {}
+    species_names = SymbolTable()
     for species, entry in learnsets.items():
         for move in entry:
-            compatibility = learned_moves.get(move["move"], [])
-            compatibility.append({"target": species, "level": move["level"]})
-            learned_moves[move["move"]] = compatibility
+            try:
+                learners = learned_moves[move.move]
+            except KeyError:
+                learners = Learners(species_names)
+                learned_moves[move.move] = learners
+            learners.append(species, move.level)
     move_data["learned"] = learned_moves
 
 
@@ -0,0 +1,56 @@
+import json
+from convert.model import to_json
+from convert.output import atomic_open
+
+# Each line is a compact JSON array [key, value]. Records of nested tables
+# such as moves.json use a list of keys, e.g. ["tm", 42], and encounter
+# rows are keyed by row id under "rows", e.g. ["rows", 0].
+ndjson_depths = {"pokedex": 1, "locations": 1, "encounters": 2, "fields": 1, "moves": 2,
+                 "learnsets": 1}
+
+
+def iter_records(data, depth=1):
+    """Yield (key, value) for each entry of data, descending depth levels."""
+    for key, value in data.items():
+        if depth <= 1:
+            yield key, value
+        else:
+            for keys, nested in iter_records(value, depth - 1):
+                yield [key] + (keys if isinstance(keys, list) else [keys]), nested
+
+
+def write_ndjson(path, records):
+    """Write one line per (key, value) record as it is produced; return the count."""
+    count = 0
+    with atomic_open(path) as file:
+        for key, value in records:
+            file.write(json.dumps([key, value], separators=(",", ":"), default=to_json))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def iter_ndjson(path):
+    """Stream the (key, value) records of an NDJSON file, one line at a time.
+
+    Nested keys are returned as tuples.
+    """
+    with open(path, "r") as file:
+        for line in file:
+            if line.strip():
+                key, value = json.loads(line)
+                yield (tuple(key) if isinstance(key, list) else key), value
+
+
+def load_ndjson(path):
+    """Rebuild the nested dictionary written by write_ndjson."""
+    data = {}
+    for key, value in iter_ndjson(path):
+        if isinstance(key, tuple):
+            table = data
+            for part in key[:-1]:
+                table = table.setdefault(part, {})
+            table[key[-1]] = value
+        else:
+            data[key] = value
+    return data
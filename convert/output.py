@@ -0,0 +1,110 @@
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+from convert.model import to_json
+
+# Encoder chunks per block; most chunks are a single token of a few characters
+block_chunks = 1 << 14
+
+
+def iter_json_blocks(data, indent=4, compact=False):
+    """Yield the JSON text of data in blocks of block_chunks encoder chunks.
+
+    The text is indented, or without any whitespace if compact.
+    """
+    if compact:
+        encoder = json.JSONEncoder(separators=(",", ":"), default=to_json)
+    else:
+        encoder = json.JSONEncoder(indent=indent, default=to_json)
+    chunks = encoder.iterencode(data)
+    while True:
+        block = "".join(islice(chunks, block_chunks))
+        if not block:
+            break
+        yield block
+
+
+@contextmanager
+def atomic_open(path, mode='w'):
+    """Open a temp file next to path and move it into place if the block succeeds."""
+    temp_path = f"{path}.{os.urandom(16).hex()}.tmp"
+    try:
+        with open(temp_path, mode) as file:
+            yield file
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def replace_file(path, data, mode='w'):
+    """Write data to a temp file next to path, then move it into place."""
+    with atomic_open(path, mode) as file:
+        file.write(data)
+
+
+def write_text(path, text):
+    """Atomically replace path with text. Returns False if it already matched."""
+    try:
+        with open(path, 'r') as file:
+            if file.read() == text:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    replace_file(path, text)
+    return True
+
+
+def write_json(path, data, indent=4, compact=False):
+    """Atomically replace path with data as JSON. Returns False if it already matched.
+
+    The text is encoded in blocks and compared with the existing file as it
+    is produced, so large tables are never held in memory as one string.
+    """
+    try:
+        with open(path, 'r') as file:
+            for block in iter_json_blocks(data, indent, compact):
+                if file.read(len(block)) != block:
+                    break
+            else:
+                if not file.read(1):
+                    return False
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    with atomic_open(path) as file:
+        for block in iter_json_blocks(data, indent, compact):
+            file.write(block)
+    return True
+
+
+def write_json_batch(items, indent=4, compact=False):
+    """Write each (path, data) pair and return how many files changed."""
+    return sum(write_json(path, data, indent, compact) for path, data in items)
+
+
+def write_pokedex(pokedex, pokedex_dir, jobs=1, indent=4, compact=False):
+    """Write one JSON file per species and return (written, unchanged) counts.
+
+    With more than one job the entries are split into batches that are
+    serialized and written by a process pool.
+    """
+    items = [(os.path.join(pokedex_dir, species + ".json"), entry)
+             for species, entry in pokedex.items()]
+    if jobs <= 1:
+        written = write_json_batch(items, indent, compact)
+    else:
+        batch_size = max(1, len(items) // (jobs * 4) + 1)
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        # multiprocessing is only loaded when more than one job is asked for
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = sum(executor.map(write_json_batch, batches,
+                                       [indent] * len(batches), [compact] * len(batches)))
+    return written, len(items) - written
@@ -0,0 +1,122 @@
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from convert import csv_dir
+from convert.profiling import StageProfiler
+from convert.locations import parse_location_files
+from convert.moves import (
+    tm_list,
+    learnsets,
+    tm_compatibilities,
+    tutor_compatibilities,
+    parse_tm_tutor_file,
+    parse_learnsets,
+    build_compatibility_table,
+)
+from convert.pokedex import (
+    base_stats,
+    egg_moves,
+    evolutions_file,
+    pokedex_blurbs,
+    pokedex_names,
+    pokedex_entries_file,
+    species_to_dex_file,
+    pokedex_orders_file,
+    habitats_file,
+    parse_base_stats,
+    parse_egg_moves,
+    parse_evolutions,
+    convert_string_file,
+    parse_dex_categories,
+    parse_pokedex_entries,
+    parse_species_to_dex,
+    parse_pokedex_orders,
+    parse_habitats,
+)
+
+# A parser stage: the function to call with args, the files it reads and
+# the names of the stages whose results must be available first.
+Stage = namedtuple("Stage", ["func", "inputs", "args", "requires"], defaults=[(), ()])
+
+parse_stages = {
+    "tm_tutor": Stage(parse_tm_tutor_file, [tm_list]),
+    "learnsets": Stage(parse_learnsets, [learnsets]),
+    "tm_compatibility": Stage(build_compatibility_table, [tm_compatibilities], (tm_compatibilities,)),
+    "tutor_compatibility": Stage(build_compatibility_table, [tutor_compatibilities], (tutor_compatibilities,)),
+    "base_stats": Stage(parse_base_stats, [base_stats]),
+    "egg_moves": Stage(parse_egg_moves, [egg_moves]),
+    "evolutions": Stage(parse_evolutions, [evolutions_file]),
+    "blurbs": Stage(convert_string_file, [pokedex_blurbs], (pokedex_blurbs,)),
+    "names": Stage(convert_string_file, [pokedex_names], (pokedex_names,)),
+    "pokedex_entries": Stage(parse_pokedex_entries, [pokedex_entries_file]),
+    "dex_categories": Stage(parse_dex_categories, [pokedex_entries_file, pokedex_blurbs]),
+    "species_to_dex": Stage(parse_species_to_dex, [species_to_dex_file]),
+    "pokedex_orders": Stage(parse_pokedex_orders, [pokedex_orders_file]),
+    "habitats": Stage(parse_habitats, [habitats_file]),
+    "locations": Stage(parse_location_files, [csv_dir]),
+}
+
+
+def run_stages(stages=None, jobs=1, stage_cache=None, profiler=None):
+    """Run the stages and return a dictionary of stage name to result.
+
+    Cached results are loaded in this process. With more than one job the
+    remaining stages run in a process pool as soon as the stages they
+    require have finished; results are keyed by name so the output does
+    not depend on completion order. A profiler records each stage when
+    they run serially, or the whole pool as a single "parse" stage.
+    """
+    if stages is None:
+        stages = parse_stages
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
+
+    results = {}
+    pending = {}
+    for name, stage in stages.items():
+        if stage_cache is None:
+            pending[name] = stage
+            continue
+        try:
+            results[name] = stage_cache.load(stage.func, stage.inputs, *stage.args)
+        except KeyError:
+            pending[name] = stage
+
+    def finish(name, result):
+        stage = pending.pop(name)
+        if stage_cache is not None:
+            stage_cache.store(stage.func, stage.inputs, result, *stage.args)
+        results[name] = result
+
+    def ready(running):
+        return [name for name, stage in pending.items()
+                if name not in running and all(dep in results for dep in stage.requires)]
+
+    if jobs <= 1:
+        while pending:
+            names = ready(())
+            if not names:
+                raise ValueError(f"Unsatisfiable stage requirements: {sorted(pending)}")
+            for name in names:
+                stage = pending[name]
+                with profiler.stage(f"parse:{name}") as record:
+                    result = stage.func(*stage.args)
+                    record["records"] = len(result)
+                finish(name, result)
+        return results
+
+    # multiprocessing is only loaded when more than one job is asked for
+    from concurrent.futures import ProcessPoolExecutor
+
+    with profiler.stage("parse") as record, ProcessPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+        while pending:
+            for name in ready(running.values()):
+                stage = pending[name]
+                running[executor.submit(stage.func, *stage.args)] = name
+            if not running:
+                raise ValueError(f"Unsatisfiable stage requirements: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), future.result())
+        record["records"] = len(results)
+    return results
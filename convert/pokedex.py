@@ -1,74 +1,228 @@
 import re
 import os
-from convert import c_dir
+import sys
+from convert import c_dir, run_stage
+from convert.ctables import (
+    iter_array_tables,
+    iter_index_table,
+    iter_struct_table,
+    parse_struct_table,
+    read_source,
+    to_bool,
+    to_int,
+    to_percent,
+    to_symbol,
+    to_text,
+)
 from convert.error import report_error
+from convert.moves import build_compatibility_index
 
 base_stats = os.path.join(c_dir, "src/Base_Stats.c")
 egg_moves = os.path.join(c_dir, "src/Egg_Moves.c")
 pokedex_blurbs = os.path.join(c_dir, "strings/Pokedex_Data.string")
 pokedex_names = os.path.join(c_dir, "strings/Pokemon_Name_Table.string")
 evolutions_file = os.path.join(c_dir, "src/Evolution Table.c")
-
-
-def parse_base_stats():
+pokedex_entries_file = os.path.join(c_dir, "src/Pokedex_Data_Table.c")
+species_to_dex_file = os.path.join(c_dir, "src/Species_To_Pokdex_Table.c")
+pokedex_orders_file = os.path.join(c_dir, "src/Pokedex_Orders.c")
+habitats_file = os.path.join(c_dir, "src/Habitat_Table.c")
+habitat_page_regex = re.compile(r'g(\w+?)Page\d+$')
+alternate_category_regex = re.compile(r'^\s*ALTERNATE_DEX_CATEGORY\((\w+)\),', re.MULTILINE)
+dex_category_regex = re.compile(r'#org @DEX_CATEGORY_(\w+)')
+
+
+stat_columns = ["baseHP", "baseAttack", "baseDefense", "baseSpAttack", "baseSpDefense", "baseSpeed"]
+ev_columns = ["evYield_HP", "evYield_Attack", "evYield_Defense",
+              "evYield_SpAttack", "evYield_SpDefense", "evYield_Speed"]
+base_stats_fields = {
+    **{field: to_int for field in [
+        *stat_columns, "catchRate", "expYield", *ev_columns,
+        "eggCycles", "friendship", "safariZoneFleeRate",
+    ]},
+    **{field: to_symbol for field in [
+        "type1", "type2", "item1", "item2", "growthRate", "eggGroup1", "eggGroup2",
+        "ability1", "ability2", "hiddenAbility",
+    ]},
+    "genderRatio": to_percent,
+    "noFlip": to_bool,
+}
+
+
+def parse_base_stats(file_path=base_stats):
     """Parse species data from the given file and return as a dictionary."""
-    parsed_data = {}
-    species_regex = re.compile(r'\[SPECIES_(\w+)\]')
-    attribute_regex = re.compile(r'\.(\w+)\s*=\s*(.+),')
-
-    current_species = None
-
-    with open(base_stats, 'r') as file:
+    return parse_struct_table(file_path, "SPECIES_", base_stats_fields)
+
+
+pokedex_entry_fields = {
+    "categoryName": to_text,
+    "height": to_int,
+    "weight": to_int,
+}
+
+
+def parse_pokedex_entries():
+    """Parse the national dex number, category, height and weight of each national dex entry.
+
+    Neither the NATIONAL_DEX_ constants nor the species to dex table carry
+    the number itself: the enum is declared in a header that is not part
+    of c/, and Hoenn species are numbered in regional order (TAILLOW comes
+    before WINGULL in the dex but after it in the species list). The entry
+    table is indexed by every constant in enum order from NATIONAL_DEX_NONE,
+    so the position of each index is its number.
+    """
+    entries = {}
+    for number, (dex_key, fields) in enumerate(
+            iter_struct_table(pokedex_entries_file, "NATIONAL_DEX_", pokedex_entry_fields)):
+        if number == 0 and dex_key != "NONE":
+            report_error("parse_pokedex_entries", f"NATIONAL_DEX_{dex_key} is the first entry, not NONE")
+        entries[dex_key] = {
+            "nationalDex": number,
+            "category": fields["categoryName"],
+            "height": fields["height"],
+            "weight": fields["weight"],
+        }
+    return entries
+
+
+def parse_dex_categories():
+    """Map each form listed in gAlternateDexCategories to its own category, e.g. PONYTA_G -> Unique Horn.
+
+    The table names a DEX_CATEGORY_ string of Pokedex_Data.string per form,
+    where consecutive labels share the text that follows them.
+    """
+    forms = alternate_category_regex.findall(read_source(pokedex_entries_file))
+    categories = {}
+    labels = []
+    with open(pokedex_blurbs, 'r') as file:
         for line in file:
             line = line.strip()
-
-            # Match the species identifier (e.g., [SPECIES_BULBASAUR])
-            species_match = species_regex.match(line)
-            if species_match:
-                current_species = species_match.group(1).replace("SPECIES_", "")
-                parsed_data[current_species] = {}
-                continue
-
-            # Match attribute lines (e.g., .baseHP = 45,)
-            attribute_match = attribute_regex.match(line)
-            if attribute_match and current_species:
-                key = attribute_match.group(1)
-                value = attribute_match.group(2)
-
-                # Handle specific data types
-                if value.isdigit():
-                    value = int(value)
-                elif value.replace('.', '', 1).isdigit():
-                    value = float(value)
-                elif 'PERCENT_FEMALE' in value:
-                    # Extract percentage from PERCENT_FEMALE(x)
-                    value = float(re.findall(r'\d+\.?\d*', value)[0])
-                elif value.startswith('TRUE'):
-                    value = True
-                elif value.startswith('FALSE'):
-                    value = False
-                elif value.startswith('ABILITY_') or value.startswith('TYPE_') or value.startswith('ITEM_') or value.startswith('EGG_GROUP_'):
-                    value = value  # Leave string as is
-
-                parsed_data[current_species][key] = value
-
-    return parsed_data
-
-
-def get_relatives(species, pokedex):
+            label_match = dex_category_regex.match(line)
+            if label_match:
+                labels.append(label_match.group(1))
+            elif line.startswith("#org"):
+                labels = []
+            elif line and labels:
+                categories.update((label, line) for label in labels)
+                labels = []
+    return {form: categories[form] for form in forms if form in categories}
+
+
+def parse_species_to_dex():
+    """Map each species to its national dex constant, e.g. VENUSAUR_MEGA -> VENUSAUR."""
+    return dict(iter_index_table(species_to_dex_file, "SPECIES_", "NATIONAL_DEX_"))
+
+
+def parse_pokedex_orders():
+    """Map each pokedex sort order (Regional, Alphabetical, ...) to its species list."""
+    return {name.replace("gPokedexOrder_", ""): species
+            for name, species in iter_array_tables(pokedex_orders_file, "SPECIES_")}
+
+
+def parse_habitats():
+    """Map each species to the habitat page it is listed on, e.g. Grassland."""
+    habitats = {}
+    for name, species_list in iter_array_tables(habitats_file, "SPECIES_"):
+        page_match = habitat_page_regex.match(name)
+        if not page_match:
+            continue
+        for species in species_list:
+            habitats.setdefault(species, page_match.group(1))
+    return habitats
+
+
+def add_dex_data(pokedex, pokedex_entries, species_to_dex, pokedex_orders, habitats, dex_categories):
+    """Add national dex number, category, height, weight, regional dex number and habitat.
+
+    Forms share the national dex entry of their base species, so they also
+    get its height and weight (the C tables have none per form) and its
+    category, unless dex_categories gives the form its own.
+    """
+    for _ in iter_dex_data(pokedex, pokedex_entries, species_to_dex, pokedex_orders, habitats,
+                           dex_categories):
+        pass
+
+
+def iter_dex_data(pokedex, pokedex_entries, species_to_dex, pokedex_orders, habitats, dex_categories):
+    """Add the dex data of add_dex_data to one entry at a time, yielding (species, entry) when done.
+
+    This is the last merge of an entry, so a caller can write each entry
+    out as soon as it is yielded.
+    """
+    regional_dex = {species: number
+                    for number, species in enumerate(pokedex_orders.get("Regional", []), 1)}
+    for species, entry in pokedex.items():
+        try:
+            entry.update(pokedex_entries[species_to_dex[species]])
+        except KeyError:
+            pass
+        if species in dex_categories:
+            entry["category"] = dex_categories[species]
+        if species in regional_dex:
+            entry["regionalDex"] = regional_dex[species]
+        if species in habitats:
+            entry["habitat"] = habitats[species]
+        yield species, entry
+
+
+class RelativesIndex:
+    """Substring index over pokedex keys used to find alternate forms.
+
+    Each key is filed under every 1-, 2- and 3-character gram it contains,
+    so a lookup only verifies the keys sharing the rarest trigram of the
+    name instead of scanning the whole pokedex. Results keep pokedex order.
+    """
+    gram_size = 3
+
+    def __init__(self, keys=()):
+        self.order = {}
+        self.grams = {}
+        for key in keys:
+            self.add(key)
+
+    def add(self, key):
+        """Index a new pokedex key. Keys already indexed are ignored."""
+        if key in self.order:
+            return
+        self.order[key] = len(self.order)
+        grams = {key[start:start + size]
+                 for size in range(1, self.gram_size + 1)
+                 for start in range(len(key) - size + 1)}
+        for gram in grams:
+            self.grams.setdefault(gram, []).append(key)
+
+    def find(self, fragment):
+        """Return every indexed key containing fragment, in insertion order."""
+        if not fragment:
+            return list(self.order)
+        if len(fragment) <= self.gram_size:
+            return list(self.grams.get(fragment, []))
+
+        postings = []
+        for start in range(len(fragment) - self.gram_size + 1):
+            posting = self.grams.get(fragment[start:start + self.gram_size])
+            if posting is None:
+                return []
+            postings.append(posting)
+        candidates = min(postings, key=len)
+        return [key for key in candidates if fragment in key]
+
+
+def get_relatives(species, pokedex, relatives_index=None):
     species_basename = species.split("_")[0]
+    if relatives_index is not None:
+        return relatives_index.find(species_basename)
     relatives = [relative for relative in pokedex if species_basename in relative]
     return relatives
 
 
-def parse_egg_moves():
+def parse_egg_moves(file_path=egg_moves):
     """Parse egg moves data from the given file and return as a dictionary."""
     egg_moves_data = {}
     start_parsing = False
     current_species = None
     current_moves = []
 
-    with open(egg_moves, 'r') as file:
+    with open(file_path, 'r') as file:
         for line in file:
             line = line.strip()
 
@@ -96,27 +250,30 @@ def parse_egg_moves():
             elif current_species and line.endswith('),'):
                 # If it's the closing line of the block, collect the remaining moves and save the entry
                 moves = line.replace('),', '').split(',')
-                current_moves.extend([move.strip() for move in moves if move.strip()])
+                current_moves.extend([sys.intern(move.strip()) for move in moves if move.strip()])
                 egg_moves_data[current_species] = current_moves
                 current_species = None  # Reset species to handle the next one
             elif current_species:
                 # Collect moves across multiple lines
                 moves = line.split(',')
-                current_moves.extend([move.strip() for move in moves if move.strip()])
+                current_moves.extend([sys.intern(move.strip()) for move in moves if move.strip()])
 
     return egg_moves_data
 
 
-def parse_evolutions():
+def parse_evolutions(file_path=evolutions_file):
     """Parse the evolution data from the file and return it as a dictionary."""
     evolution_data = {}
 
-    # Regex to match each species entry and extract the evolution details
-    species_pattern = re.compile(r'\[SPECIES_(\w+)\]\s*=\s*\{(.+?})},', re.MULTILINE)
+    # Regex to match each species entry and extract the evolution details.
+    # Entries with several evolutions span lines, and comments are removed
+    # first so commented-out evolutions are neither parsed nor end an entry.
+    comment_pattern = re.compile(r'/\*.*?\*/|//[^\n]*', re.DOTALL)
+    species_pattern = re.compile(r'\[SPECIES_(\w+)\]\s*=\s*\{(.+?})},', re.DOTALL)
     evolution_pattern = re.compile(r'\{\s*(\w+),\s*([^,]+),\s*(SPECIES_\w+),\s*([^}]+)\s*}', re.MULTILINE)
 
-    with open(evolutions_file, 'r') as file:
-        file_content = file.read()
+    with open(file_path, 'r') as file:
+        file_content = comment_pattern.sub("", file.read())
 
         # Iterate through each species block
         for species_match in species_pattern.finditer(file_content):
@@ -180,6 +337,13 @@ def convert_string_file(file_path):
                 current_text = []
                 continue  # Skip to the next line
 
+            # Other labels, such as the DEX_CATEGORY_ strings, end the current entry
+            if line.startswith("#org"):
+                if current_entry:
+                    data[current_entry] = " ".join(current_text).replace("\\n", " ").replace("Pok\\emon", "Pokémon")
+                current_entry = None
+                continue
+
             # Ignore setting entries like MAX_LENGTH=10 or FILL_FF=True
             setting_match = setting_pattern.match(line)
             if setting_match:
@@ -196,17 +360,19 @@ def convert_string_file(file_path):
     return data
 
 
-def merge_data(pokedex, data, key):
+def merge_data(pokedex, data, key, relatives_index=None):
     """Merge species data and egg moves into a single data structure."""
+    if relatives_index is None:
+        relatives_index = RelativesIndex(pokedex)
     for species, value in data.items():
         if species in pokedex:
             pokedex[species][key] = value
         else:
-            relatives = get_relatives(species, pokedex)
+            relatives = get_relatives(species, pokedex, relatives_index)
             for suffix_len in [-1, -2, -3]:
-                relatives += get_relatives(species[:suffix_len], pokedex)
+                relatives += get_relatives(species[:suffix_len], pokedex, relatives_index)
             for prefix_len in [1]:
-                relatives += get_relatives(species[prefix_len:], pokedex)
+                relatives += get_relatives(species[prefix_len:], pokedex, relatives_index)
             if relatives:
                 for relative in relatives:
                     if key not in pokedex[relative]:
@@ -216,49 +382,162 @@ def merge_data(pokedex, data, key):
                 report_error("merge_data", f"{species} in {key} not found in pokedex")
 
 
-def create_evolves_from(pokedex):
+class EvolutionGraph:
+    """Forward and reverse evolution edges built in one pass.
+
+    Takes a mapping of species to evolution lists as returned by
+    parse_evolutions (or the "evolve_to" entries of a merged pokedex).
+    Mega and Gigantamax entries are form changes that also point back to
+    their base form, so they are kept out of the stage chains and only
+    join a form to its family. Their forms are never the root of a family.
+    """
+    form_change_methods = {"EVO_MEGA", "EVO_GIGANTAMAX"}
+    # Conditions of the edges leading from a form back to its base form,
+    # e.g. {EVO_MEGA, ITEM_NONE, SPECIES_VENUSAUR, ...}
+    form_revert_conditions = {"ITEM_NONE", "FALSE"}
+
+    def __init__(self, evolutions):
+        self.evolve_to = {}
+        self.evolve_from = {}
+        self.stage_to = {}
+        self.stage_from = {}
+        self.forms = set()
+        self.order = {species: index for index, species in enumerate(evolutions)}
+        for species, evos in evolutions.items():
+            targets = self.evolve_to.setdefault(species, [])
+            for evo in evos:
+                target = evo["target"]
+                targets.append(target)
+                self.evolve_from.setdefault(target, []).append(species)
+                if evo["method"] not in self.form_change_methods:
+                    self.stage_to.setdefault(species, []).append(target)
+                    self.stage_from.setdefault(target, []).append(species)
+                elif evo.get("condition") in self.form_revert_conditions:
+                    self.forms.add(species)
+                else:
+                    self.forms.add(target)
+        self._families = {}
+
+    def targets(self, species):
+        return self.evolve_to.get(species, [])
+
+    def sources(self, species):
+        return self.evolve_from.get(species, [])
+
+    def _build_family(self, species):
+        # Collect the connected component, then order it from its base form
+        members = [species]
+        seen = {species}
+        for member in members:
+            for neighbour in self.targets(member) + self.sources(member):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    members.append(neighbour)
+        members.sort(key=lambda member: self.order.get(member, len(self.order)))
+
+        # Evolution tables may list a form before its base form, or the base
+        # form may have no entry at all, so forms are never picked as root
+        base_forms = [member for member in members if member not in self.forms] or members
+        bases = [member for member in base_forms if member not in self.stage_from]
+        evolving = [member for member in bases if member in self.stage_to]
+        root = (evolving or bases or base_forms)[0]
+
+        family = [root]
+        seen = {root}
+        for member in family:
+            for neighbour in self.stage_to.get(member, []) + self.targets(member) + self.sources(member):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    family.append(neighbour)
+        for member in family:
+            self._families[member] = family
+        return family
+
+    def family(self, species):
+        """Return every species related to species, base form first."""
+        try:
+            return self._families[species]
+        except KeyError:
+            return self._build_family(species)
+
+    def root(self, species):
+        """Return the base form of the family species belongs to."""
+        return self.family(species)[0]
+
+    def chains(self, species):
+        """Return each stage path from the base form to a final stage."""
+        chains = []
+        stack = [[self.root(species)]]
+        while stack:
+            chain = stack.pop()
+            targets = [target for target in self.stage_to.get(chain[-1], []) if target not in chain]
+            if not targets:
+                chains.append(chain)
+            for target in reversed(targets):
+                stack.append(chain + [target])
+        return chains
+
+
+def create_evolves_from(pokedex, evolution_graph=None):
     # We want to create a back-reference for the evolution, i.e. evolve_from
+    if evolution_graph is None:
+        evolution_graph = EvolutionGraph(
+            {species: entry.get("evolve_to", []) for species, entry in pokedex.items()})
     for species, entry in pokedex.items():
-        for from_species, from_entry in pokedex.items():
-            from_evos = [from_species for from_evo in from_entry.get("evolve_to", [])
-                         if from_evo["target"] == species]
-            entry["evolve_from"] = entry.get("evolve_from", []) + from_evos
-
-
-def build_pokedex():
-    pokedex = parse_base_stats()
-    egg_moves = parse_egg_moves()
-    evolutions = parse_evolutions()
-    blurbs_data = convert_string_file(pokedex_blurbs)
-    names_data = convert_string_file(pokedex_names)
-
-    merge_data(pokedex, egg_moves, "egg_moves")
-    merge_data(pokedex, evolutions, "evolve_to")
-    merge_data(pokedex, blurbs_data, "blurb")
-    merge_data(pokedex, names_data, "name")
-    create_evolves_from(pokedex)
+        entry["evolve_from"] = entry.get("evolve_from", []) + evolution_graph.sources(species)
+    return evolution_graph
+
+
+def build_pokedex(stage_cache=None):
+    pokedex, _ = merge_pokedex(
+        run_stage(stage_cache, parse_base_stats, [base_stats]),
+        run_stage(stage_cache, parse_egg_moves, [egg_moves]),
+        run_stage(stage_cache, parse_evolutions, [evolutions_file]),
+        run_stage(stage_cache, convert_string_file, [pokedex_blurbs], pokedex_blurbs),
+        run_stage(stage_cache, convert_string_file, [pokedex_names], pokedex_names),
+    )
     return pokedex
 
 
-def add_compatible_moves(pokedex, move_data):
+def merge_pokedex(pokedex, egg_moves_data, evolutions, blurbs_data, names_data):
+    """Merge already parsed tables into the base stats pokedex.
+
+    Returns the pokedex and the EvolutionGraph of its merged evolve_to
+    entries, which also filled in evolve_from.
+    """
+    relatives_index = RelativesIndex(pokedex)
+    merge_data(pokedex, egg_moves_data, "egg_moves", relatives_index)
+    merge_data(pokedex, evolutions, "evolve_to", relatives_index)
+    merge_data(pokedex, blurbs_data, "blurb", relatives_index)
+    merge_data(pokedex, names_data, "name", relatives_index)
+    evolution_graph = create_evolves_from(pokedex)
+    return pokedex, evolution_graph
+
+
+def add_compatible_moves(pokedex, move_data, compatibility_index=None):
+    if compatibility_index is None:
+        compatibility_index = build_compatibility_index(move_data)
     for species in pokedex:
         # add compatibility tables
+        try:
+            species_moves = compatibility_index[species]
+        except KeyError:
+            continue
         for category in ["tm", "tutor"]:
-            move_list = []
-            for move_num, entry in move_data[category].items():
-                if species in entry["compatibility"]:
-                    move_list.append(entry["key"])
-
+            move_list = [move_data[category][move_num]["key"]
+                         for move_num in species_moves[category]]
             if move_list:
                 pokedex[species][category] = move_list
 
 
-def propagate_learnset(pokedex, learnset_key="learnset"):
+def propagate_learnset(pokedex, learnset_key="learnset", relatives_index=None):
     # If there is a MEGA or other alternate version of a Pokemon,
     # its will have the learnset and the regular one will not.
+    if relatives_index is None:
+        relatives_index = RelativesIndex(pokedex)
     for species, entry in pokedex.items():
         if learnset_key not in entry or not entry[learnset_key]:
-            relatives = get_relatives(species, pokedex)
+            relatives = get_relatives(species, pokedex, relatives_index)
             for relative in relatives:
                 if learnset_key in pokedex[relative]:
                     pokedex[species][learnset_key] = pokedex[relative][learnset_key]
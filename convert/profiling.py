@@ -0,0 +1,89 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from convert.output import atomic_open
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is left out of the report there
+    resource = None
+
+profile_file = "stage_profile.json"
+cprofile_dir = "stage_profiles"
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class StageProfiler:
+    """Record wall time, CPU time, memory and record counts per pipeline stage.
+
+    Stages must not be nested, since each one resets the tracemalloc peak.
+    When disabled, stage() still yields a record but nothing is measured.
+    """
+
+    def __init__(self, enabled=True, trace_memory=True, cprofile=False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.cprofile = enabled and cprofile
+        self.stages = []
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            # Keep tracing across watch rebuilds, which save the report again
+            atexit.register(tracemalloc.stop)
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the enclosed block. Set record["records"] to log a count."""
+        record = {"stage": name}
+        if not self.enabled:
+            yield record
+            return
+
+        profile = None
+        if self.cprofile:
+            profile = cProfile.Profile()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            record["wall_time"] = time.perf_counter() - wall_start
+            record["cpu_time"] = time.process_time() - cpu_start
+            if self.trace_memory:
+                record["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            record["max_rss_bytes"] = max_rss_bytes()
+            if profile is not None:
+                os.makedirs(cprofile_dir, exist_ok=True)
+                stats_file = f"{len(self.stages):02d}_{name.replace(':', '_')}.prof"
+                profile.dump_stats(os.path.join(cprofile_dir, stats_file))
+            self.stages.append(record)
+
+    def save(self, path=profile_file):
+        """Write every stage recorded so far; called again after each watch rebuild."""
+        if not self.enabled:
+            return
+        report = {
+            "total_wall_time": sum(record["wall_time"] for record in self.stages),
+            "total_cpu_time": sum(record["cpu_time"] for record in self.stages),
+            "stages": self.stages,
+        }
+        with atomic_open(path) as file:
+            json.dump(report, file, indent=1)
@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from urllib.parse import parse_qsl, unquote, urlsplit
+from convert import dst_dir
+from convert.dedupe import SharedLists, shared_lists_file
+from convert.encounters import EncounterIndex
+from convert.learners import MoveLearnerIndex, methods, move_key
+
+default_host = "127.0.0.1"
+default_port = 8080
+default_cache_size = 1024
+default_reload_interval = 2.0
+data_files = ["moves.json", "locations.json", "fields.json", shared_lists_file]
+# Query parameter of each EncounterIndex.select filter
+encounter_filters = {"species": "species", "route": "routes", "method": "methods", "tag": "tags"}
+reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def load_json(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def load_pokedex(pokedex_dir):
+    """Load every species file, resolving shared list references if present."""
+    shared_path = os.path.join(os.path.dirname(pokedex_dir), shared_lists_file)
+    shared_lists = SharedLists(shared_path) if os.path.exists(shared_path) else None
+    with os.scandir(pokedex_dir) as entries:
+        paths = sorted(entry.path for entry in entries if entry.name.endswith(".json"))
+    pokedex = {}
+    for path in paths:
+        species = os.path.basename(path)[:-len(".json")]
+        if shared_lists is None:
+            pokedex[species] = load_json(path)
+        else:
+            pokedex[species] = shared_lists.load_entry(path).resolved()
+    return pokedex
+
+
+def output_stamp(data_dir):
+    """Return the size and modification time of every file the server loads.
+
+    main.py replaces each output with a rename, which also updates the
+    modification time of the pokedex directory.
+    """
+    stamp = []
+    for name in data_files + ["pokedex"]:
+        try:
+            stat = os.stat(os.path.join(data_dir, name))
+        except OSError:
+            stat = None
+        stamp.append((name, stat and stat.st_size, stat and stat.st_mtime_ns))
+    return stamp
+
+
+class PokedexData:
+    """In-memory indexes over one generated output directory."""
+
+    def __init__(self, data_dir=dst_dir):
+        self.pokedex = load_pokedex(os.path.join(data_dir, "pokedex"))
+        self.moves = load_json(os.path.join(data_dir, "moves.json"))
+        self.locations = load_json(os.path.join(data_dir, "locations.json"))
+        self.fields = load_json(os.path.join(data_dir, "fields.json"))
+        self.encounters = EncounterIndex.from_location_data(self.locations)
+        egg_moves = {species: entry["egg_moves"]
+                     for species, entry in self.pokedex.items() if "egg_moves" in entry}
+        self.learners = MoveLearnerIndex(self.moves, egg_moves, self.pokedex)
+        self.facets = {field: {value: set(species) for value, species in values.items()}
+                       for field, values in self.fields.items()}
+
+    def species(self, key=None, facets=()):
+        """Return one entry, or the species matching every field=value facet."""
+        if key is not None:
+            try:
+                return self.pokedex[key]
+            except KeyError:
+                raise QueryError(404, f"Unknown species: {key}")
+        matches = None
+        for field, value in facets:
+            if field not in self.facets:
+                raise QueryError(400, f"Unknown facet {field}, expected one of {sorted(self.facets)}")
+            species = self.facets[field].get(value, set())
+            matches = species if matches is None else matches & species
+        return [species for species in self.pokedex if matches is None or species in matches]
+
+    def facet(self, field=None, value=None):
+        if field is None:
+            return {field: sorted(values) for field, values in self.fields.items()}
+        try:
+            values = self.fields[field]
+        except KeyError:
+            raise QueryError(404, f"Unknown facet: {field}")
+        if value is None:
+            return {value: len(species) for value, species in values.items()}
+        return values.get(value, [])
+
+    def learn(self, moves, learn_methods=methods, max_level=None, any_move=False):
+        if not moves:
+            raise QueryError(400, "At least one move is required")
+        unknown = [method for method in learn_methods if method not in methods]
+        if unknown:
+            raise QueryError(400, f"Unknown learn methods {unknown}, expected {list(methods)}")
+        moves = [move_key(move) for move in moves]
+        query = self.learners.learn_any if any_move else self.learners.learn_all
+        return self.learners.names(query(moves, learn_methods, max_level))
+
+    def location(self, route=None):
+        if route is None:
+            return list(self.locations)
+        try:
+            return self.locations[route]
+        except KeyError:
+            raise QueryError(404, f"Unknown route: {route}")
+
+    def encounter(self, species):
+        if species not in self.pokedex:
+            raise QueryError(404, f"Unknown species: {species}")
+        return self.pokedex[species].get("location", [])
+
+    def find_encounters(self, filters, min_level=None, max_level=None):
+        """Return the encounter rows matching species, route, method and tag filters."""
+        unknown = [field for field in filters if field not in encounter_filters]
+        if unknown:
+            raise QueryError(400, f"Unknown filters {unknown}, expected {list(encounter_filters)}")
+        return [row.to_json() for row in self.encounters.find(
+            **{encounter_filters[field]: values for field, values in filters.items()},
+            min_level=min_level, max_level=max_level)]
+
+
+class ResponseCache:
+    """Bounded LRU cache of serialized response bodies."""
+
+    def __init__(self, max_size=default_cache_size):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            body = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def query_flag(value):
+    return value.lower() in ("1", "true", "yes")
+
+
+class QueryServer:
+    """Read-only HTTP/1.1 JSON service over the output of main.py.
+
+    Routes:
+        /species                    every species key
+        /species?type=TYPE_FIRE     species matching each field=value facet
+        /species/<key>              one merged pokedex entry
+        /learners?move=surf         species learning every move (repeat move=)
+                                    &any=1, &method=tm (repeatable), &max_level=N
+        /facets[/<field>[/<value>]] facet values, counts or species
+        /locations[/<route>]        route names or one route's encounters
+        /encounters/<species>       where a species can be found
+        /encounters?method=Old Rod  encounter rows matching each filter: species,
+                                    route, method and tag (repeatable),
+                                    &min_level=N, &max_level=N (floors, B1F is -1)
+
+    Responses are cached as bytes in a ResponseCache, which is cleared when
+    the outputs change and are reloaded.
+    """
+
+    def __init__(self, data_dir=dst_dir, cache_size=default_cache_size,
+                 reload_interval=default_reload_interval):
+        self.data_dir = data_dir
+        self.reload_interval = reload_interval
+        self.stamp = output_stamp(data_dir)
+        self.data = PokedexData(data_dir)
+        self.cache = ResponseCache(cache_size)
+
+    def route(self, parts, params):
+        data = self.data
+        if parts[0] == "species" and len(parts) <= 2:
+            if len(parts) == 2:
+                return data.species(parts[1])
+            return data.species(facets=params)
+        if parts[0] == "learners" and len(parts) == 1:
+            max_level = dict(params).get("max_level")
+            if max_level is not None and not max_level.isdigit():
+                raise QueryError(400, f"max_level must be an integer: {max_level}")
+            return data.learn(
+                [move for key, value in params if key == "move" for move in value.split(",")],
+                [value for key, value in params if key == "method"] or methods,
+                int(max_level) if max_level is not None else None,
+                query_flag(dict(params).get("any", "")),
+            )
+        if parts[0] == "facets" and len(parts) <= 3:
+            return data.facet(*parts[1:])
+        if parts[0] == "locations" and len(parts) <= 2:
+            return data.location(*parts[1:])
+        if parts[0] == "encounters" and len(parts) == 2:
+            return data.encounter(parts[1])
+        if parts[0] == "encounters" and len(parts) == 1:
+            filters = {}
+            levels = {}
+            for key, value in params:
+                if key in ("min_level", "max_level"):
+                    if not value.lstrip("-").isdigit():
+                        raise QueryError(400, f"{key} must be an integer: {value}")
+                    levels[key] = int(value)
+                else:
+                    filters.setdefault(key, []).append(value)
+            return data.find_encounters(filters, **levels)
+        raise QueryError(404, f"No route for /{'/'.join(parts)}")
+
+    def query(self, target):
+        """Return (status, body bytes) for a request target such as /species/BULBASAUR."""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        params = sorted(parse_qsl(url.query))
+        key = (tuple(parts), tuple(params))
+        body = self.cache.get(key)
+        if body is not None:
+            return 200, body
+        try:
+            if not parts:
+                raise QueryError(404, "No route for /")
+            result = self.route(parts, params)
+        except QueryError as error:
+            return error.status, json.dumps({"error": str(error)}).encode("utf-8")
+        body = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        self.cache.put(key, body)
+        return 200, body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    method, version = "GET", "HTTP/1.0"
+                    status, body = 400, b'{"error":"Malformed request line"}'
+                else:
+                    method, target, version = parts
+                    if method in ("GET", "HEAD"):
+                        status, body = self.query(target)
+                    else:
+                        status, body = 405, b'{"error":"Only GET and HEAD are supported"}'
+
+                keep_alive = (version == "HTTP/1.1"
+                              and headers.get("connection", "").lower() != "close")
+                head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                        f"Content-Type: application/json\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode("latin-1") + (body if method != "HEAD" else b""))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            # ValueError is raised for lines longer than the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def watch_outputs(self):
+        """Reload the data once the outputs change and stay unchanged for one interval."""
+        pending = None
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            stamp = output_stamp(self.data_dir)
+            if stamp == self.stamp:
+                pending = None
+                continue
+            if stamp != pending:
+                # main.py may still be writing; wait for the files to settle
+                pending = stamp
+                continue
+            try:
+                data = await asyncio.to_thread(PokedexData, self.data_dir)
+            except (OSError, ValueError) as error:
+                print(f"Reload failed, still serving the previous data: {error}")
+                pending = None
+                continue
+            self.data, self.stamp = data, stamp
+            self.cache.clear()
+            print(f"Reloaded {len(data.pokedex)} species from {self.data_dir}")
+
+    async def serve(self, host=default_host, port=default_port):
+        server = await asyncio.start_server(self.handle, host, port)
+        reloader = asyncio.create_task(self.watch_outputs())
+        print(f"Serving {len(self.data.pokedex)} species from {self.data_dir} on http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reloader.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve read-only queries over the generated pokedex.")
+    parser.add_argument("--host", default=default_host)
+    parser.add_argument("--port", type=int, default=default_port)
+    parser.add_argument("--data-dir", default=dst_dir, metavar="DIR",
+                        help="output directory written by main.py")
+    parser.add_argument("--cache-size", type=int, default=default_cache_size,
+                        help="number of responses kept in the LRU cache")
+    parser.add_argument("--reload-interval", type=float, default=default_reload_interval,
+                        help="seconds between checks for regenerated outputs")
+    args = parser.parse_args()
+
+    server = QueryServer(args.data_dir, args.cache_size, args.reload_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import uuid
+from convert.pokedex import ev_columns, stat_columns
+
+schema = """
+CREATE TABLE species (
+    key TEXT PRIMARY KEY,
+    name TEXT,
+    blurb TEXT,
+    category TEXT,
+    national_dex INTEGER,
+    regional_dex INTEGER,
+    height INTEGER,
+    weight INTEGER,
+    habitat TEXT,
+    type1 TEXT,
+    type2 TEXT,
+    growth_rate TEXT,
+    egg_group1 TEXT,
+    egg_group2 TEXT,
+    item1 TEXT,
+    item2 TEXT
+);
+CREATE TABLE stats (
+    species TEXT PRIMARY KEY REFERENCES species(key),
+    base_hp INTEGER,
+    base_attack INTEGER,
+    base_defense INTEGER,
+    base_sp_attack INTEGER,
+    base_sp_defense INTEGER,
+    base_speed INTEGER,
+    base_stat_total INTEGER,
+    ev_hp INTEGER,
+    ev_attack INTEGER,
+    ev_defense INTEGER,
+    ev_sp_attack INTEGER,
+    ev_sp_defense INTEGER,
+    ev_speed INTEGER,
+    catch_rate INTEGER,
+    exp_yield INTEGER,
+    gender_ratio,
+    egg_cycles INTEGER,
+    friendship INTEGER
+);
+CREATE TABLE abilities (
+    species TEXT REFERENCES species(key),
+    slot TEXT,
+    ability TEXT
+);
+CREATE TABLE evolutions (
+    species TEXT REFERENCES species(key),
+    target TEXT,
+    method TEXT,
+    condition TEXT,
+    extra TEXT
+);
+CREATE TABLE moves (
+    key TEXT,
+    category TEXT,
+    number INTEGER,
+    name TEXT
+);
+CREATE TABLE learnsets (
+    species TEXT REFERENCES species(key),
+    method TEXT,
+    move TEXT,
+    level INTEGER
+);
+CREATE TABLE encounters (
+    species TEXT,
+    route TEXT,
+    method TEXT,
+    area TEXT
+);
+CREATE TABLE facets (
+    field TEXT,
+    value TEXT,
+    species TEXT
+);
+"""
+indexes = """
+CREATE INDEX abilities_species ON abilities(species);
+CREATE INDEX abilities_ability ON abilities(ability);
+CREATE INDEX evolutions_species ON evolutions(species);
+CREATE INDEX evolutions_target ON evolutions(target);
+CREATE INDEX moves_key ON moves(key);
+CREATE INDEX learnsets_species ON learnsets(species);
+CREATE INDEX learnsets_move ON learnsets(move, method);
+CREATE INDEX encounters_species ON encounters(species);
+CREATE INDEX encounters_route ON encounters(route, method, area);
+CREATE INDEX facets_value ON facets(field, value);
+CREATE INDEX facets_species ON facets(species);
+"""
+species_fields = ["name", "blurb", "category", "nationalDex", "regionalDex", "height", "weight",
+                  "habitat", "type1", "type2", "growthRate", "eggGroup1", "eggGroup2",
+                  "item1", "item2"]
+stats_fields = stat_columns + ev_columns + ["catchRate", "expYield", "genderRatio",
+                                            "eggCycles", "friendship"]
+ability_slots = ["ability1", "ability2", "hiddenAbility"]
+
+
+def species_rows(pokedex):
+    for species, entry in pokedex.items():
+        yield [species] + [entry.get(field) for field in species_fields]
+
+
+def stats_rows(pokedex):
+    for species, entry in pokedex.items():
+        if "baseHP" not in entry:
+            continue
+        stats = [entry.get(field) for field in stat_columns]
+        yield ([species] + stats + [sum(stats)]
+               + [entry.get(field) for field in stats_fields[len(stat_columns):]])
+
+
+def ability_rows(pokedex):
+    for species, entry in pokedex.items():
+        for slot in ability_slots:
+            ability = entry.get(slot)
+            if ability and ability != "ABILITY_NONE":
+                yield species, slot, ability
+
+
+def evolution_rows(pokedex):
+    for species, entry in pokedex.items():
+        for evo in entry.get("evolve_to", []):
+            yield species, evo["target"], evo["method"], evo["condition"], evo["extra"]
+
+
+def move_rows(move_data):
+    for category in ["tm", "tutor"]:
+        for number, entry in move_data[category].items():
+            yield entry["key"], category, number, entry.get("name")
+
+
+def learnset_rows(pokedex):
+    for species, entry in pokedex.items():
+        for move in entry.get("learnset", []):
+            yield species, "levelup", move["move"], move["level"]
+        for method, key in [("tm", "tm"), ("tutor", "tutor"), ("egg", "egg_moves")]:
+            for move in entry.get(key, []):
+                yield species, method, move, None
+
+
+def encounter_rows(pokedex):
+    for species, entry in pokedex.items():
+        for encounter in entry.get("location", []):
+            yield species, encounter["route"], encounter["method"], encounter["area"]
+
+
+def facet_rows(fields_data):
+    for field, values in fields_data.items():
+        for value, species_list in values.items():
+            for species in species_list:
+                yield field, value, species
+
+
+def export_sqlite(path, pokedex, move_data, fields_data):
+    """Write the merged data to a new SQLite database at path.
+
+    Every table is filled with executemany inside one transaction and the
+    indexes are built after the inserts. The file is built next to path
+    and moved into place once complete, so journaling is not needed.
+    """
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    connection = sqlite3.connect(temp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(schema)
+        with connection:
+            for table, width, rows in [
+                ("species", 1 + len(species_fields), species_rows(pokedex)),
+                ("stats", 2 + len(stats_fields), stats_rows(pokedex)),
+                ("abilities", 3, ability_rows(pokedex)),
+                ("evolutions", 5, evolution_rows(pokedex)),
+                ("moves", 4, move_rows(move_data)),
+                ("learnsets", 4, learnset_rows(pokedex)),
+                ("encounters", 4, encounter_rows(pokedex)),
+                ("facets", 3, facet_rows(fields_data)),
+            ]:
+                placeholders = ", ".join(["?"] * width)
+                connection.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+        connection.executescript(indexes)
+        connection.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        connection.close()
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,165 @@
+import zipfile
+import numpy as np
+from convert.pokedex import ev_columns, stat_columns
+
+numeric_columns = stat_columns + ev_columns + ["catchRate"]
+categorical_columns = {
+    "type": ["type1", "type2"],
+    "ability": ["ability1", "ability2", "hiddenAbility"],
+    "eggGroup": ["eggGroup1", "eggGroup2"],
+}
+missing_code = -1
+
+
+class StatTable:
+    """Columnar NumPy store of base stats, EV yields, catch rate and categories.
+
+    Numeric fields are int16 columns plus a derived "baseStatTotal".
+    Categorical fields are int16 codes into one label array per group, so
+    type1 and type2 share the same codes. Missing values are coded -1.
+    """
+
+    def __init__(self, species, columns, codes, labels):
+        self.species = species
+        self.columns = columns
+        self.codes = codes
+        self.labels = labels
+        self.label_codes = {group: {label: code for code, label in enumerate(group_labels)}
+                            for group, group_labels in labels.items()}
+
+    @classmethod
+    def from_pokedex(cls, pokedex):
+        entries = list(pokedex.values())
+        species = np.array(list(pokedex), dtype=str)
+        columns = {column: np.array([entry.get(column, 0) for entry in entries], dtype=np.int16)
+                   for column in numeric_columns}
+        columns["baseStatTotal"] = np.sum([columns[column] for column in stat_columns],
+                                          axis=0, dtype=np.int16)
+
+        codes = {}
+        labels = {}
+        for group, fields in categorical_columns.items():
+            group_labels = sorted({entry[field] for entry in entries for field in fields
+                                   if field in entry and "NONE" not in entry[field]})
+            lookup = {label: code for code, label in enumerate(group_labels)}
+            labels[group] = np.array(group_labels, dtype=str)
+            for field in fields:
+                codes[field] = np.array([lookup.get(entry.get(field), missing_code)
+                                         for entry in entries], dtype=np.int16)
+        return cls(species, columns, codes, labels)
+
+    def __len__(self):
+        return len(self.species)
+
+    def column(self, name):
+        try:
+            return self.columns[name]
+        except KeyError:
+            return self.codes[name]
+
+    def has(self, group, label):
+        """Return a mask of the species with label in any field of group."""
+        code = self.label_codes[group].get(label, missing_code - 1)
+        mask = np.zeros(len(self), dtype=bool)
+        for field in categorical_columns[group]:
+            mask |= self.codes[field] == code
+        return mask
+
+    def where(self, minimum=None, maximum=None, **categories):
+        """Return a mask from column thresholds and group labels.
+
+        minimum and maximum map column names to inclusive bounds; keyword
+        arguments such as type="TYPE_FIRE" require a categorical label.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, bound in (minimum or {}).items():
+            mask &= self.column(name) >= bound
+        for name, bound in (maximum or {}).items():
+            mask &= self.column(name) <= bound
+        for group, label in categories.items():
+            mask &= self.has(group, label)
+        return mask
+
+    def rank(self, name, mask=None, descending=True, limit=None):
+        """Return species names ordered by column name, optionally masked."""
+        indices = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+        values = self.column(name)[indices]
+        order = np.argsort(-values.astype(np.int32) if descending else values, kind="stable")
+        return self.species[indices[order][:limit]].tolist()
+
+    def percentile(self, name, q, mask=None):
+        values = self.column(name) if mask is None else self.column(name)[mask]
+        return np.percentile(values, q)
+
+    def mean_by(self, name, group):
+        """Return the mean of column name for each label of group.
+
+        A species is counted once per distinct label, so a mono-type species
+        with type1 == type2 only counts toward its type once.
+        """
+        values = self.column(name).astype(np.float64)
+        count = len(self.labels[group])
+        sums = np.zeros(count)
+        totals = np.zeros(count)
+        previous = []
+        for field in categorical_columns[group]:
+            codes = self.codes[field]
+            valid = codes != missing_code
+            for earlier in previous:
+                valid &= codes != earlier
+            sums += np.bincount(codes[valid], weights=values[valid], minlength=count)
+            totals += np.bincount(codes[valid], minlength=count)
+            previous.append(codes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / totals
+        return {label: mean for label, mean in zip(self.labels[group].tolist(), means.tolist())
+                if not np.isnan(mean)}
+
+    def save(self, path):
+        """Write an uncompressed .npz so each array can be memory-mapped by load."""
+        arrays = {"species": self.species}
+        arrays.update({f"column_{name}": values for name, values in self.columns.items()})
+        arrays.update({f"code_{name}": values for name, values in self.codes.items()})
+        arrays.update({f"label_{group}": values for group, values in self.labels.items()})
+        with open(path, "wb") as file:
+            np.savez(file, **arrays)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a table saved by save, memory-mapping its arrays by default."""
+        arrays = load_npz(path, mmap)
+        species = arrays.pop("species")
+        columns, codes, labels = {}, {}, {}
+        for key, values in arrays.items():
+            kind, name = key.split("_", 1)
+            {"column": columns, "code": codes, "label": labels}[kind][name] = values
+        return cls(species, columns, codes, labels)
+
+
+def load_npz(path, mmap=True):
+    """Return the arrays of an uncompressed .npz, memory-mapped if mmap is set.
+
+    np.load ignores mmap_mode for .npz archives, so each stored member is
+    mapped at its data offset inside the zip file instead.
+    """
+    if not mmap:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+    with open(path, "rb") as file, zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} in {path} is compressed and cannot be mapped")
+            # The local header is 30 bytes plus the file name and extra field
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(file.read(4), dtype="<u2")
+            file.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+            if np.lib.format.read_magic(file) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            arrays[info.filename[:-len(".npy")]] = np.memmap(
+                path, dtype=dtype, mode="r", offset=file.tell(), shape=shape,
+                order="F" if fortran_order else "C")
+    return arrays
@@ -0,0 +1,141 @@
+import os
+import pickle
+import time
+import traceback
+from convert.api import Pokedex
+from convert.error import clear_errors, save_errors
+from convert.pipeline import parse_stages
+
+poll_interval = 0.5
+
+
+class MemoryStageCache:
+    """Keep pickled parser results in memory between watch rebuilds.
+
+    Every load unpickles a fresh copy, since the merges modify the parsed
+    tables in place. An on-disk StageCache can be passed to fill and back
+    the memory cache, as with --incremental.
+    """
+
+    def __init__(self, stage_cache=None):
+        self.stage_cache = stage_cache
+        self.results = {}
+
+    def key(self, func, args):
+        return func.__module__, func.__name__, args
+
+    def load(self, func, inputs, *args):
+        key = self.key(func, args)
+        try:
+            return pickle.loads(self.results[key])
+        except KeyError:
+            if self.stage_cache is None:
+                raise
+        result = self.stage_cache.load(func, inputs, *args)
+        self.results[key] = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        return result
+
+    def store(self, func, inputs, result, *args):
+        self.results[self.key(func, args)] = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        if self.stage_cache is not None:
+            self.stage_cache.store(func, inputs, result, *args)
+
+    def invalidate(self, stage_names):
+        for name in stage_names:
+            stage = parse_stages[name]
+            self.results.pop(self.key(stage.func, stage.args), None)
+
+
+def stage_owners(stages=parse_stages):
+    """Return each input file or directory and the names of the stages reading it."""
+    owners = {}
+    for name, stage in stages.items():
+        for path in stage.inputs:
+            owners.setdefault(os.path.normpath(path), []).append(name)
+    return owners
+
+
+def snapshot(paths):
+    """Return the (mtime, size) of every file in paths, walking directories."""
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                for file_name in names:
+                    file_path = os.path.join(root, file_name)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    files[file_path] = (stat.st_mtime_ns, stat.st_size)
+        else:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def changed_files(before, after):
+    """Return the files added, removed or modified between two snapshots."""
+    return sorted(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+
+
+def owning_stages(files, owners):
+    """Map changed files to the stages reading them or a directory containing them."""
+    stages = set()
+    for file in files:
+        path = os.path.normpath(file)
+        while True:
+            stages.update(owners.get(path, []))
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+    return sorted(stages, key=list(parse_stages).index)
+
+
+def watch(dex, build, interval=poll_interval):
+    """Poll the parser inputs and rebuild whenever one of them changes.
+
+    dex must have been loaded through a MemoryStageCache. On each change
+    only the stages owning the changed files are re-parsed, properties
+    that none of them feed are reused, and build(dex, reused) writes the
+    outputs. Runs until interrupted.
+    """
+    owners = stage_owners()
+    state = snapshot(owners)
+    failed = []
+    print(f"Watching {len(state)} input files for changes, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(owners)
+            files = changed_files(state, current)
+            state = current
+            if not files:
+                continue
+
+            start = time.perf_counter()
+            # Stages of a failed rebuild stay stale until a rebuild succeeds
+            stages = owning_stages(files, owners)
+            stages += [stage for stage in failed if stage not in stages]
+            dex.stage_cache.invalidate(stages)
+            clear_errors()
+            rebuilt = Pokedex(dex.jobs, dex.stage_cache, dex.profiler)
+            reused = rebuilt.reuse(dex, stages)
+            try:
+                build(rebuilt, reused)
+            except Exception:
+                traceback.print_exc()
+                failed = stages
+                print(f"Rebuild failed after changes to {', '.join(map(os.path.relpath, files))}")
+                continue
+            dex, failed = rebuilt, []
+            save_errors()
+            print(f"Rebuilt in {time.perf_counter() - start:.2f}s after changes to "
+                  f"{', '.join(map(os.path.relpath, files))}; "
+                  f"re-parsed {', '.join(stages)}; reused {', '.join(reused) or 'nothing'}")
+    except KeyboardInterrupt:
+        print("Stopped watching")
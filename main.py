@@ -1,75 +1,272 @@
+import argparse
 import os.path
-import json
 from convert import dst_dir
-from convert.moves import (
-    parse_tm_tutor_file,
-    parse_learnsets,
-    add_compatibilities,
-    add_learned_moves,
-)
-from convert.locations import (
-    parse_location_files,
-    create_location_lookup,
-    update_pokemon_names,
-)
-from convert.pokedex import (
-    build_pokedex,
-    merge_data,
-    propagate_learnset,
-    add_compatible_moves,
-)
-from convert.collect_fields import collect_field_types
+from convert.bundle import write_bundle
+from convert.output import write_json, write_text, write_pokedex
+from convert.ndjson import iter_records, ndjson_depths, write_ndjson
+from convert.profiling import StageProfiler
+from convert.learners import MoveLearnerIndex, methods, move_key
+from convert.api import Pokedex, species_stages
+from convert.watch import MemoryStageCache, watch
 from convert.error import save_errors
 
-# Collect Moves Data
-move_data = parse_tm_tutor_file()
-learnsets_data = parse_learnsets()
-add_compatibilities(move_data)
-add_learned_moves(move_data, learnsets_data)
-
-# Collect Pokedex Data
-pokedex = build_pokedex()
-propagate_learnset(pokedex)
-
-# Collect and merge location data
-location_data = parse_location_files()
-update_pokemon_names(location_data, pokedex)
-location_lookup = create_location_lookup(location_data)
-merge_data(pokedex, location_lookup, "location")
-
-# Add learnsets and TM/Tutors to Pokedex
-merge_data(pokedex, learnsets_data, "learnset")
-add_compatible_moves(pokedex, move_data)
-propagate_learnset(pokedex, "learnset")
-propagate_learnset(pokedex, "tm")
-propagate_learnset(pokedex, "tutor")
-
-# Create output files
-pokedex_dir = os.path.join(dst_dir, "pokedex")
-move_file = os.path.join(dst_dir, "moves.json")
-fields_file = os.path.join(dst_dir, "fields.json")
-locations_file = os.path.join(dst_dir, "locations.json")
-
-with open(locations_file, 'w') as json_file:
-    json.dump(location_data, json_file, indent=1)
-print(f"Locations data successfully parsed and saved to {locations_file}")
-
-with open(move_file, 'w') as json_file:
-    json.dump(move_data, json_file, indent=1)
-print(f"Move data successfully parsed and saved to {move_file}")
-
-fields_data = collect_field_types(pokedex)
-with open(fields_file, 'w') as json_file:
-    json.dump(fields_data, json_file, indent=1)
-print(f"Fields data successfully parsed and saved to {fields_file}")
-
-# Output each species Pokedex entry to a separate JSON file
-for species in pokedex:
-    out_file = os.path.join(pokedex_dir, species + ".json")
-
-    # Output the merged data to a JSON file
-    with open(out_file, 'w') as json_file:
-        json.dump(pokedex[species], json_file, indent=4)
-        print(f"Saving pokedex data: {out_file}")
-
-save_errors()
+
+def query_learners(dex, args):
+    dex.load(["tm_tutor", "learnsets", "tm_compatibility", "tutor_compatibility", "egg_moves"])
+    if dex.stage_cache is not None:
+        dex.stage_cache.save()
+
+    index = MoveLearnerIndex(dex.moves, dex.egg_moves)
+    moves = [move_key(move) for move in args.moves]
+    query = index.learn_any if args.any else index.learn_all
+    for species in index.names(query(moves, args.methods, args.max_level)):
+        print(species)
+
+
+def query_encounters(dex, args):
+    dex.load(["locations"] + species_stages)
+    if dex.stage_cache is not None:
+        dex.stage_cache.save()
+
+    rows = dex.encounters.find(species=args.species, routes=args.routes, methods=args.methods,
+                               tags=args.tags, min_level=args.min_level, max_level=args.max_level)
+    for row in rows:
+        print("\t".join([row.species, row.route, row.method, row.area]))
+
+
+def write_ndjson_outputs(dex, args, reused=()):
+    """Write each artifact to a .ndjson file, one line per record.
+
+    Each artifact is written as soon as the merge that builds it finishes:
+    moves before any species merge (a move's learners are only complete
+    once every learnset is read, so moves stream from the merged table),
+    then locations and encounters. Pokedex records are written as
+    Pokedex.iter_entries yields them, while the next entries are still
+    getting their dex data, and fields are collected from the same stream.
+    """
+    profiler = dex.profiler
+    outputs = [
+        ("moves", lambda: iter_records(dex.moves, ndjson_depths["moves"])),
+        ("locations", lambda: iter_records(dex.locations)),
+        ("encounters", lambda: iter_records({"rows": dict(enumerate(dex.encounters.rows))},
+                                            ndjson_depths["encounters"])),
+        ("pokedex", dex.iter_entries),
+        ("fields", lambda: iter_records(dex.fields)),
+    ]
+    shared_lists = None
+    for name, records in outputs:
+        if name in reused:
+            continue
+        path = os.path.join(args.output_dir, name + ".ndjson")
+        records = records()
+        if name == "pokedex" and args.dedupe_lists:
+            from convert.dedupe import iter_deduped
+
+            shared_lists = {}
+            records = iter_deduped(records, shared_lists)
+        with profiler.stage(f"write_ndjson:{name}") as record:
+            record["records"] = write_ndjson(path, records)
+            print(f"{name.capitalize()} data saved to {path}: {record['records']} records")
+
+    if shared_lists is not None:
+        # Complete only once every pokedex entry has been written
+        from convert.dedupe import shared_lists_file
+
+        shared_file = os.path.join(args.output_dir, shared_lists_file.replace(".json", ".ndjson"))
+        write_ndjson(shared_file, iter_records(shared_lists))
+        print(f"Shared move lists saved to {shared_file}: {len(shared_lists)} distinct lists")
+
+
+def write_json_outputs(dex, args, reused=()):
+    profiler = dex.profiler
+    pokedex = dex.entries
+    move_data = dex.moves
+    location_data = dex.locations
+
+    pokedex_dir = os.path.join(args.output_dir, "pokedex")
+    move_file = os.path.join(args.output_dir, "moves.json")
+    fields_file = os.path.join(args.output_dir, "fields.json")
+    locations_file = os.path.join(args.output_dir, "locations.json")
+    encounters_file = os.path.join(args.output_dir, "encounters.json")
+    os.makedirs(pokedex_dir, exist_ok=True)
+
+    with profiler.stage("write_json") as record:
+        write_json(locations_file, location_data, indent=1)
+        print(f"Locations data successfully parsed and saved to {locations_file}")
+
+        write_json(encounters_file, dex.encounters.to_json(), indent=1)
+        print(f"Encounter index saved to {encounters_file}: {len(dex.encounters)} encounters")
+
+        if "moves" not in reused:
+            write_json(move_file, move_data, indent=1)
+            print(f"Move data successfully parsed and saved to {move_file}")
+
+        write_json(fields_file, dex.fields, indent=1)
+        print(f"Fields data successfully parsed and saved to {fields_file}")
+        record["records"] = 4
+
+    # Output each species Pokedex entry to a separate JSON file
+    with profiler.stage("write_pokedex") as record:
+        pokedex_output = pokedex
+        if args.dedupe_lists:
+            from convert.dedupe import dedupe_lists, shared_lists_file
+
+            shared_file = os.path.join(args.output_dir, shared_lists_file)
+            pokedex_output, shared_lists = dedupe_lists(pokedex)
+            write_json(shared_file, shared_lists, indent=1, compact=args.compact)
+            print(f"Shared move lists saved to {shared_file}: {len(shared_lists)} distinct lists")
+        written, unchanged = write_pokedex(pokedex_output, pokedex_dir, args.jobs, compact=args.compact)
+        print(f"Pokedex data saved to {pokedex_dir}: {written} files written, {unchanged} unchanged")
+        record["records"] = len(pokedex)
+
+
+def write_outputs(dex, args, reused=()):
+    """Merge everything in dex and write the outputs selected by args.
+
+    Outputs built only from the reused properties of a watch rebuild are
+    already up to date and are skipped.
+    """
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.format == "ndjson":
+        write_ndjson_outputs(dex, args, reused)
+    else:
+        write_json_outputs(dex, args, reused)
+
+    profiler = dex.profiler
+    pokedex = dex.entries
+    bundle_file = os.path.join(args.output_dir, "pokedex.bundle")
+    stats_file = os.path.join(args.output_dir, "stats.npz")
+    sqlite_file = os.path.join(args.output_dir, "unbound.sqlite")
+
+    if args.bundle:
+        with profiler.stage("write_bundle") as record:
+            write_bundle(pokedex, bundle_file)
+            print(f"Pokedex bundle saved to {bundle_file}")
+            record["records"] = len(pokedex)
+
+    if args.sqlite:
+        # sqlite3 is only needed for this output, so import it on demand
+        from convert.sqlite_export import export_sqlite
+
+        with profiler.stage("export_sqlite") as record:
+            export_sqlite(sqlite_file, pokedex, dex.moves, dex.fields)
+            print(f"SQLite database saved to {sqlite_file}")
+            record["records"] = len(pokedex)
+
+    if args.stats:
+        # NumPy is only needed for this output, so import it on demand
+        from convert.stats import StatTable
+
+        with profiler.stage("write_stats") as record:
+            StatTable.from_pokedex(pokedex).save(stats_file)
+            print(f"Stat table saved to {stats_file}")
+            record["records"] = len(pokedex)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the Unbound C and CSV data to JSON.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse cached parser output for unchanged inputs")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="number of processes used to run the parsers and write the pokedex")
+    parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                        help="write JSON documents, or newline-delimited JSON with one "
+                             "species, move, route, encounter or field per line. ndjson writes "
+                             "each species as soon as its last merge step finishes")
+    parser.add_argument("--compact", action="store_true",
+                        help="write pokedex entries without indentation")
+    parser.add_argument("--dedupe-lists", action="store_true",
+                        help="write each distinct learnset/tm/tutor/egg move list once to "
+                             "learnsets.json and reference it from the species files")
+    parser.add_argument("--bundle", action="store_true",
+                        help="also write every pokedex entry to a single indexed bundle file")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="also export the merged data to an indexed SQLite database")
+    parser.add_argument("--stats", action="store_true",
+                        help="also write a NumPy stat table to stats.npz (requires numpy)")
+    parser.add_argument("--output-dir", default=dst_dir, metavar="DIR",
+                        help="directory the JSON output is written to")
+    parser.add_argument("--changelog", metavar="FILE",
+                        help="write the species, move and route changes since the JSON "
+                             "build in the output directory to FILE")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, poll the C and CSV inputs and rebuild on changes")
+    parser.add_argument("--profile", action="store_true",
+                        help="record time and memory per stage in a JSON report")
+    parser.add_argument("--cprofile", action="store_true",
+                        help="also dump cProfile stats for each stage (implies --profile)")
+    subparsers = parser.add_subparsers(dest="command")
+    learners_parser = subparsers.add_parser(
+        "learners", help="list the species that can learn a set of moves")
+    learners_parser.add_argument("moves", nargs="+", help="move names, e.g. MOVE_SURF or surf")
+    learners_parser.add_argument("--any", action="store_true",
+                                 help="match species learning any of the moves instead of all")
+    learners_parser.add_argument("--methods", nargs="+", choices=methods, default=list(methods),
+                                 help="learn methods to consider")
+    learners_parser.add_argument("--max-level", type=int,
+                                 help="only count level-up moves learned at or below this level")
+    encounters_parser = subparsers.add_parser(
+        "encounters", help="list the encounters matching every filter, one per line")
+    encounters_parser.add_argument("--species", nargs="+", default=[], help="species keys, e.g. PIDGEY")
+    encounters_parser.add_argument("--routes", nargs="+", default=[], help="route names, e.g. \"Route 2\"")
+    encounters_parser.add_argument("--methods", nargs="+", default=[],
+                                   help="encounter methods, e.g. land surf \"Old Rod\"")
+    encounters_parser.add_argument("--tags", nargs="+", default=[],
+                                   help="area tags, e.g. swarm special level flowers default")
+    encounters_parser.add_argument("--min-level", type=int,
+                                   help="only floor areas with a floor at or above this one (B1F is -1)")
+    encounters_parser.add_argument("--max-level", type=int,
+                                   help="only floor areas with a floor at or below this one")
+    args = parser.parse_args()
+    if args.cprofile:
+        args.profile = True
+    stage_cache = None
+    if args.incremental:
+        # hashlib and pickle are only needed for the cache, so import it on demand
+        from convert.cache import StageCache
+
+        stage_cache = StageCache()
+
+    profiler = StageProfiler(enabled=args.profile, cprofile=args.cprofile)
+    # Watch mode keeps the parsed tables in memory to re-run only changed parsers
+    dex = Pokedex(args.jobs, MemoryStageCache(stage_cache) if args.watch else stage_cache, profiler)
+
+    if args.command == "learners":
+        query_learners(dex, args)
+        return
+    if args.command == "encounters":
+        query_encounters(dex, args)
+        return
+
+    # Run the independent C and CSV parsers, then merge everything
+    dex.load()
+    if args.changelog:
+        # Compare against the previous build before it is overwritten
+        from convert.diff import BuildSource, diff_builds, format_changelog
+
+        changes = diff_builds(BuildSource.from_directory(args.output_dir),
+                              BuildSource.from_data(dex.entries, dex.moves, dex.locations, args.compact))
+        write_text(args.changelog, format_changelog(changes))
+        print(f"Changelog against the previous build saved to {args.changelog}")
+    write_outputs(dex, args)
+
+    if stage_cache is not None:
+        stage_cache.save()
+        print(f"Incremental build: {len(stage_cache.hits)} cached stages reused, "
+              f"{len(stage_cache.misses)} re-run")
+
+    save_errors()
+    profiler.save()
+
+    if args.watch:
+        def rebuild(dex, reused):
+            write_outputs(dex, args, reused)
+            if stage_cache is not None:
+                stage_cache.save()
+            dex.profiler.save()
+
+        watch(dex, rebuild)
+
+
+if __name__ == "__main__":
+    main()